@@ -0,0 +1,154 @@
+"""
+Bottleneck - Benchmark of bt itself on the reference kernels.
+
+Runs the whole report on each kernel and records how long bt took, how
+much of it was spent outside the measured runs and how far the fitted
+serial fraction is from the one the kernel was written with.
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import results
+import runner
+
+# reference kernels and their serial fraction, None where it is not known
+KERNELS = [ ('compute', 0.0),
+            ('stream', None),
+            ('imbalance', None),
+            ('serial', 0.25) ]
+
+PACKAGE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLES = os.path.join(PACKAGE, 'tests', 'examples')
+CONFIG = os.path.join(PACKAGE, 'cfg', 'bt.cfg')
+
+def stage(kernel, root, examples=EXAMPLES, config=CONFIG):
+    """Copy the kernels into a directory named after one, ready for bt."""
+    directory = os.path.join(root, kernel)
+    shutil.copytree(examples, directory,
+                    ignore = shutil.ignore_patterns('*.cache', '*.o'))
+    shutil.copy(config, os.path.join(directory, 'bt.cfg'))
+    return directory
+
+def environ():
+    """Return the environment importing bottleneck from this checkout."""
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = os.pathsep.join([ PACKAGE ] +
+                                                [ path for path in [ environment.get('PYTHONPATH') ] if path ])
+    return environment
+
+def run(directory, arguments=()):
+    """Run bt from scratch in a staged directory, return exit code and seconds.
+
+    Console output is kept in bt.out inside the directory.
+    """
+    environment = environ()
+    command = [ sys.executable, '-m', 'bottleneck.bottleneck', '--force' ] + list(arguments)
+    start = time.time()
+    with open(os.path.join(directory, 'bt.out'), 'w') as output:
+        code = subprocess.call(command, cwd = directory, env = environment,
+                               stdout = output, stderr = subprocess.STDOUT)
+    return code, time.time() - start
+
+def startup(repeat=5):
+    """Return the fastest of several bt --help runs in seconds."""
+    environment = environ()
+    command = [ sys.executable, '-m', 'bottleneck.bottleneck', '--help' ]
+    times = []
+    with open(os.devnull, 'w') as output:
+        for i in range(0, repeat):
+            start = time.time()
+            subprocess.check_call(command, env = environment, stdout = output)
+            times.append(time.time() - start)
+    return min(times)
+
+def latest(kernel, since, home=None):
+    """Return the newest log directory of a kernel written since a time."""
+    home = home or os.path.expanduser('~')
+    paths = [ path for path in glob.glob('{0}/.bt/{1}/*'.format(home, kernel))
+              if os.path.isdir(path) and os.path.getmtime(path) >= since ]
+    return max(paths, key = os.path.getmtime) if paths else None
+
+def summarize(kernel, expected, code, wall, logdir):
+    """Return wall time, overhead per local run and serial fraction error."""
+    summary = { 'kernel': kernel, 'returncode': code, 'wall': wall }
+    if logdir is None or not os.path.exists(os.path.join(logdir, 'results.json')):
+        return summary
+
+    metadata, sections = results.read(logdir)
+    elapsed = []
+    for name, columns in sorted(sections.items()):
+        if 'elapsed' not in columns or 'status' not in columns or 'worker' in columns:
+            continue
+        elapsed += [ value for value, status in zip(columns['elapsed'], columns['status'])
+                     if status != runner.SKIPPED and not math.isnan(value) ]
+    summary['runs'] = len(elapsed)
+    summary['measured'] = sum(elapsed)
+    summary['overhead'] = (wall - sum(elapsed)) / len(elapsed) if elapsed else float('nan')
+
+    serial = metadata.get('metrics', {}).get('serial')
+    summary['serial'] = serial
+    if expected is not None and serial is not None:
+        summary['serial-error'] = abs(serial - expected)
+    return summary
+
+def show(summary):
+    """Format one benchmark row."""
+    line = '{kernel:<10} {wall:>8.1f}s'.format(**summary)
+    if 'runs' in summary:
+        line += ' {runs:>5} runs {overhead:>8.3f}s overhead per run'.format(**summary)
+    if summary.get('serial-error') is not None:
+        line += ' serial {serial:.3f} off by {serial-error:.3f}'.format(**summary)
+    if summary['returncode']:
+        line += ' (bt exited with {0}: {1})'.format(summary['returncode'],
+                                                   summary.get('error', ''))
+    return line
+
+def main():
+    """Benchmark bt on the reference kernels, write rows as JSON."""
+    names = [ name for name, expected in KERNELS ]
+    parser = argparse.ArgumentParser(description='Benchmark bt on reference kernels.')
+    parser.add_argument('kernels', nargs='*', default=names,
+                        help='kernels to run, all by default')
+    parser.add_argument('--repeat', '-r', type=int, default=1,
+                        help='reports per kernel')
+    parser.add_argument('--output', '-o', default='benchmark.json',
+                        help='path of the JSON rows')
+    args = parser.parse_args()
+
+    unknown = set(args.kernels) - set(names)
+    if unknown:
+        parser.error('unknown kernels: {0}'.format(', '.join(sorted(unknown))))
+
+    expected = dict(KERNELS)
+    root = tempfile.mkdtemp(prefix = 'bt-benchmark')
+    rows = [ { 'kernel': 'startup', 'returncode': 0, 'wall': startup() } ]
+    print show(rows[-1])
+    try:
+        for kernel in args.kernels:
+            directory = stage(kernel, root)
+            for repetition in range(0, args.repeat):
+                start = time.time()
+                code, wall = run(directory)
+                rows.append(summarize(kernel, expected[kernel], code, wall,
+                                      latest(kernel, start)))
+                if code:
+                    lines = open(os.path.join(directory, 'bt.out')).read().splitlines()
+                    rows[-1]['error'] = lines[-1] if lines else ''
+                print show(rows[-1])
+    finally:
+        shutil.rmtree(root, ignore_errors = True)
+
+    with open(args.output, 'w') as output:
+        json.dump(rows, output, indent = 1, sort_keys = True)
+
+if __name__ == "__main__":
+    main()
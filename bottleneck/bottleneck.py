@@ -5,29 +5,49 @@ Bottleneck - Performance report generator.
 """
 
 import ConfigParser
+import Queue
+import UserDict
 
 import argparse
+import csv
 import datetime
+import distutils.spawn
+import glob
+import hashlib
 import logging
 import math
-import matplotlib.pyplot
 import multiprocessing
-import numpy
+import multiprocessing.pool
 import os
-
-try:
-    import cPickle as pickle
-except:
-    import pickle
-
+import pickle
 import platform
 import pprint
+import random
 import re
-import scipy.stats
+import shutil
 import socket
 import subprocess
+import tempfile
+import threading
 import time
 
+# numpy, scipy, matplotlib and the modules built on them are imported by
+# the sections using them, so quick runs such as --help start fast
+import builds
+import counters
+import cpusets
+import environment
+import flamegraph
+import plots
+import report
+import results
+import runner
+import timeline
+import vectorization
+import worker
+
+from scheduler import Scheduler
+
 class Singleton(type):
     """Singleton metaclass."""
     _instances = {}
@@ -45,6 +65,27 @@ class Tags:
         """Tags are empty."""
         self.tags = {}
 
+class View(UserDict.DictMixin):
+    """Tags seen by a section, remembering the ones it sets."""
+    def __init__(self, tags):
+        """Wrap shared tags."""
+        self.tags = tags
+        self.written = set()
+    def __getitem__(self, key):
+        return self.tags[key]
+    def __setitem__(self, key, value):
+        self.tags[key] = value
+        self.written.add(key)
+    def __delitem__(self, key):
+        del self.tags[key]
+        self.written.discard(key)
+    def keys(self):
+        return self.tags.keys()
+    def outputs(self):
+        """Return tags set through this view."""
+        return dict([ (key, self.tags[key]) for key in self.written
+                      if key in self.tags ])
+
 class Log:
     """Enable logging."""
     __metaclass__ = Singleton
@@ -132,11 +173,25 @@ class Config:
         self.parser.add_argument('--debug', '-d',
                                  action='store_true',
                                  help='enable verbose logging')
+        self.parser.add_argument('action', nargs='?', default='report',
+                                 choices=[ 'report', 'history', 'worker' ],
+                                 help='generate a report, show history or serve runs')
+        self.parser.add_argument('--program', '-p',
+                                 help='program to show history for')
+        self.parser.add_argument('--listen', '-l',
+                                 default='localhost:{0}'.format(worker.PORT),
+                                 help='address a worker listens on')
+        self.parser.add_argument('--force', '-f',
+                                 action='store_true',
+                                 help='rerun sections even if stored results are fresh')
 
         self.args = self.parser.parse_args()
         self.config = ConfigParser.ConfigParser()
         path = os.path.abspath(self.args.config)
 
+        if self.args.action in [ 'history', 'worker' ]:
+            return self
+
         if not os.path.exists(path):
             print 'Configuration file not found.'
             raise SystemExit
@@ -156,51 +211,490 @@ class Config:
         """Get tags as a dictionary."""
         Log().debug('Getting all items from config')
         try:
-            items = dict(zip(self.config.items(section)[0::2],
-                             self.config.items(section)[1::2]))
+            items = dict(self.config.items(section))
         except ConfigParser.NoSectionError:
             Log().error('No configuration found')
             items = {}
         return items
 
+# bytes read at once from child processes and cache entries
+CHUNK = 64 * 1024
+
+# processor count used to extrapolate scaling laws
+LIMIT = 1024
+
+# run record fields kept in the history database
+MEASURED = [ 'elapsed', 'user', 'system', 'maxrss',
+             'minflt', 'majflt', 'nvcsw', 'nivcsw' ]
+
+# configuration values read as true
+BOOLEANS = [ '1', 'yes', 'true', 'on' ]
+
+# probes doubling the problem size and runtime below which samples are noise
+PROBES = 32
+NOISE = 0.01
+
+# flags of the build sampled by the profiler, frame pointers keep call
+# graphs cheap on optimized code
+PROFILED = '-O3 -g -fno-omit-frame-pointer'
+
+class Cache:
+    """Content-addressed store of command outputs."""
+    __metaclass__ = Singleton
+
+    def __init__(self):
+        """Store entries in ~/.bt/cache, evict by size and age."""
+        self.dir = '{0}/.bt/cache'.format(os.path.expanduser("~"))
+        self.size = 256 * 1024 * 1024
+        self.age = 7 * 24 * 60 * 60
+        self.hits = 0
+        self.misses = 0
+        self.hashes = {}
+        self.lock = threading.Lock()
+
+        if not os.path.exists(self.dir):
+            os.makedirs(self.dir)
+
+    def configure(self, size=None, age=None):
+        """Set size limit in megabytes and age limit in days."""
+        if size is not None:
+            self.size = float(size) * 1024 * 1024
+        if age is not None:
+            self.age = float(age) * 24 * 60 * 60
+        return self
+
+    def digest(self, path):
+        """Hash file contents, None if missing."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        # hashing is skipped while mtime and size are unchanged
+        signature = (path, stat.st_mtime, stat.st_size)
+        if signature not in self.hashes:
+            digest = hashlib.sha1()
+            with open(path, 'rb') as data:
+                for chunk in iter(lambda: data.read(1 << 20), ''):
+                    digest.update(chunk)
+            self.hashes[signature] = digest.hexdigest()
+        return self.hashes[signature]
+
+    def fingerprint(self, path):
+        """Describe a file by modification time, size and content hash."""
+        digest = self.digest(path)
+        if digest is None:
+            return '{0}:missing'.format(path)
+        stat = os.stat(path)
+        return '{0}:{1}:{2}:{3}'.format(path, stat.st_mtime, stat.st_size,
+                                        digest)
+
+    def key(self, cmd, paths=()):
+        """Hash command, host, working directory, environment and inputs."""
+        digest = hashlib.sha1()
+        digest.update(cmd)
+        digest.update(socket.gethostname())
+        digest.update(os.getcwd())
+        for name, value in sorted(os.environ.iteritems()):
+            digest.update('{0}={1}'.format(name, value))
+        for path in sorted(paths):
+            digest.update(self.fingerprint(path))
+        return digest.hexdigest()
+
+    def path(self, key):
+        """Return the file holding an entry."""
+        return '{0}/{1}.out'.format(self.dir, key)
+
+    def reader(self, key):
+        """Open cached output for reading, or return None when missing."""
+        path = self.path(key)
+        try:
+            entry = open(path, 'rb')
+        except IOError:
+            with self.lock:
+                self.misses += 1
+            Log().debug('Cache miss for {0}'.format(key))
+            return None
+
+        # touch entry so eviction drops least recently used first
+        os.utime(path, None)
+        with self.lock:
+            self.hits += 1
+        Log().debug('Cache hit for {0}'.format(key))
+        return entry
+
+    def writer(self, key):
+        """Open a temporary entry to be committed once output is complete."""
+        handle, temp = tempfile.mkstemp(prefix=key, suffix='.tmp', dir=self.dir)
+        os.close(handle)
+        return open(temp, 'wb')
+
+    def commit(self, key, entry):
+        """Publish a complete entry atomically, then evict stale entries."""
+        entry.close()
+        os.rename(entry.name, self.path(key))
+        return self.evict()
+
+    def discard(self, entry):
+        """Drop an incomplete entry."""
+        entry.close()
+        os.remove(entry.name)
+        return self
+
+    def load(self, key):
+        """Return cached output, or None when missing."""
+        entry = self.reader(key)
+        if entry is None:
+            return None
+        with entry:
+            return entry.read()
+
+    def store(self, key, output):
+        """Save output atomically, then evict stale entries."""
+        entry = self.writer(key)
+        entry.write(output)
+        return self.commit(key, entry)
+
+    def evict(self):
+        """Drop entries older than the age limit, then oldest over size."""
+        now = time.time()
+        entries = []
+        with self.lock:
+            for path in glob.glob(self.dir + '/*.out') + glob.glob(self.dir + '/*.tmp'):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if now - stat.st_mtime > self.age:
+                    os.remove(path)
+                    Log().debug('Cache evicted expired {0}'.format(path))
+                elif path.endswith('.out'):
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum([ entry[1] for entry in entries ])
+            for mtime, size, path in sorted(entries):
+                if total <= self.size:
+                    break
+                os.remove(path)
+                total -= size
+                Log().debug('Cache evicted oversized {0}'.format(path))
+
+            # program variants are touched whenever a section uses them
+            for path in glob.glob(self.dir + '/builds/*'):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if now - stat.st_mtime > self.age:
+                    shutil.rmtree(path, ignore_errors = True)
+                    Log().debug('Cache evicted expired build {0}'.format(path))
+        return self
+
+    def summary(self):
+        """Log hit and miss statistics."""
+        total = self.hits + self.misses
+        ratio = 100.0 * self.hits / total if total else 0.0
+        Log().info('Cache: {0} hits, {1} misses, {2:.1f}% hit ratio'.format(self.hits, self.misses, ratio))
+        return self
+
 class Section:
     """Report section."""
+
+    # exclusive sections are timing-sensitive and run alone, the rest share
+    exclusive = False
+
+    # sections running the program built with the configured flags
+    compiled = False
+
+    # tags gather reads, configuration or other sections' outputs; results
+    # are reused while these, the sources and the host stay the same
+    keys = None
+
+    # attributes stored along with tags, records and plots for reuse
+    kept = []
+
     def __init__(self, name):
         """Store section name, config and tags."""
         self.name = name
-        self.tags = Tags().tags
+        self.tags = View(Tags().tags)
         self.config = Config()
-        self.counter = {}
         self.output = None
+        self.records = []
+        self.parameters = []
+        self.figures = []
+
+        # concurrent runs append records and parameters as pairs
+        self.lock = threading.RLock()
+        self.key = None
+        self.reused = False
+        self.timeout = None
+        if self.tags.get('timeout'):
+            self.timeout = float(self.tags['timeout'])
+
+        # quiet mode warms up before measuring and shuffles sweep points
+        self.quiet = self.tags.get('quiet', 'no').lower() in BOOLEANS
+        self.warmups = int(self.tags.get('warmup', 1)) if self.quiet else 0
         self.log = Log()
         self.log.debug('Creating section named {0}'.format(self.name))
-    def command(self, cmd):
-        """Run command keeping logs and caching output."""
-
-        # keep count to cache multiple executions of the same command
-        try:
-            self.counter[cmd] += 1
-        except:
-            self.counter[cmd] = 0
+    def inputs(self):
+        """Return every file under the program directory, binary included."""
+        if 'dir' not in self.tags:
+            return []
+        return builds.inputs(self.tags['dir'])
+
+    def sources(self):
+        """Return inputs, leaving out the binary when sections rebuild it."""
+        if 'build' not in self.tags:
+            return self.inputs()
+        binary = os.path.join(self.tags['dir'], self.tags.get('program', ''))
+        return [ path for path in self.inputs() if path != binary ]
+
+    def digest(self):
+        """Hash what stored results depend on, None if they cannot be reused."""
+        if self.keys is None or self.tags.get('reuse', 'no').lower() not in BOOLEANS:
+            return None
+
+        import history
+
+        digest = hashlib.sha1()
+        digest.update(self.__class__.__name__)
+        digest.update(history.fingerprint())
+        for key in sorted(set(self.keys + [ 'program', 'timeout' ])):
+            digest.update('{0}={1}'.format(key, self.tags.get(key)))
+        for path in sorted(self.sources()):
+            digest.update('{0}:{1}'.format(os.path.relpath(path, self.tags['dir']),
+                                           Cache().digest(path)))
+        return 'section-' + digest.hexdigest()
+
+    def restore(self):
+        """Load stored results if still fresh, return whether it did."""
+        self.key = self.digest()
+        if self.key is None:
+            return False
+        entry = Cache().reader(self.key)
+        if entry is None:
+            return False
+        with entry:
+            stored = pickle.load(entry)
+
+        for key, value in stored['tags'].items():
+            self.tags[key] = value
+        self.records = stored['records']
+        self.parameters = stored['parameters']
+        for plot in stored['figures']:
+            self.figure(plot)
+        for attribute, value in stored['kept'].items():
+            setattr(self, attribute, value)
+        if self.records:
+            self.save()
+        self.log.info('Reusing {0} results from {1}'.format(self.name, stored['logdir']))
+        self.reused = True
+        return True
+
+    def store(self):
+        """Store results for later runs with the same inputs."""
+        if self.key is None:
+            return self
+        entry = Cache().writer(self.key)
+        pickle.dump({ 'tags': self.tags.outputs(),
+                      'records': self.records,
+                      'parameters': self.parameters,
+                      'figures': self.figures,
+                      'kept': dict([ (a, getattr(self, a)) for a in self.kept ]),
+                      'logdir': self.log.logdir }, entry, pickle.HIGHEST_PROTOCOL)
+        Cache().commit(self.key, entry)
+        return self
 
-        temp = '{0}.{1}.cache'.format(self.name, self.counter[cmd])
-        output = None
+    def refresh(self):
+        """Gather unless results stored for the same inputs can be reused."""
+        with timeline.span(self.name, 'section') as args:
+            args['reused'] = self.restore()
+            if not args['reused']:
+                self.gather()
 
-        try:
-            output = pickle.load(open(temp, "rb"))
-            self.log.debug('Loading ' + temp)
-        except IOError:
-            self.log.debug('Dumping ' + temp)
-            output = subprocess.check_output(cmd, shell = True).strip()
-            pickle.dump(output, open(temp, "wb"))
+                # nothing gathered, such as a missing tool, is not kept
+                if self.tags.outputs() or self.records or self.figures:
+                    self.store()
+        return self
 
-        with open(self.log.logdir + '/' + self.name + '.log', 'w') as log:
-            log.write(output)
+    def builder(self):
+        """Return the builder of program variants kept under the cache."""
+        return builds.Builder(self.tags['dir'], os.path.join(Cache().dir, 'builds'),
+                              self.tags['build'], self.tags.get('clean'),
+                              int(self.tags.get('cores', 0)) or None,
+                              [ (os.path.relpath(path, self.tags['dir']),
+                                 Cache().digest(path))
+                                for path in self.sources() ])
+
+    def variants(self):
+        """Return (flags, compiler) variants of the program gather runs."""
+        if self.compiled and 'build' in self.tags:
+            return [ (self.tags.get('cflags', ''), None) ]
+        return []
+
+    def variant(self, flags=None, compiler=None):
+        """Return the directory of a built variant, configured flags by default.
+
+        Programs without a build command run from their own directory.
+        """
+        if 'build' not in self.tags:
+            return self.tags['dir']
+        if flags is None:
+            flags = self.tags.get('cflags', '')
+        return self.builder().make(flags, compiler)
+
+    def figure(self, plot):
+        """Queue a plot for rendering and keep it with the results."""
+        self.figures.append(plot)
+        return plots.add(plot)
+
+    def stream(self, cmd, cache=True):
+        """Run command yielding output lines, teeing chunks to log and cache."""
+
+        store = Cache()
+        key = None
+        source = None
+        entry = None
+        process = None
+        complete = False
+
+        # spans cover the whole stream, consumer time included
+        with timeline.span(cmd, 'command', section = self.name) as args:
+            if cache:
+                key = store.key(cmd, self.inputs())
+                source = store.reader(key)
+            args['cached'] = source is not None
+
+            if source is None:
+                self.log.debug('Running ' + cmd)
+                process = subprocess.Popen(cmd, shell = True,
+                                           stdout = subprocess.PIPE)
+                source = process.stdout
+                if cache:
+                    entry = store.writer(key)
 
-        self.output = output
+            try:
+                with open(self.log.logdir + '/' + self.name + '.log', 'a') as log:
+                    pending = ''
+                    for chunk in iter(lambda: os.read(source.fileno(), CHUNK), ''):
+                        log.write(chunk)
+                        if entry is not None:
+                            entry.write(chunk)
+                        lines = (pending + chunk).split('\n')
+                        pending = lines.pop()
+                        for line in lines:
+                            yield line
+                    if pending:
+                        yield pending
+
+                if process is not None and process.wait() != 0:
+                    raise subprocess.CalledProcessError(process.returncode, cmd)
+                complete = True
+            finally:
+                source.close()
+
+                # consumer stopped early, do not leave the child running
+                if process is not None and process.poll() is None:
+                    process.kill()
+                    process.wait()
+
+                if entry is not None:
+                    if complete:
+                        store.commit(key, entry)
+                    else:
+                        store.discard(entry)
+
+    def command(self, cmd, cache=True):
+        """Run command keeping logs, caching output unless told not to."""
+        self.output = '\n'.join(self.stream(cmd, cache)).strip()
+        return self
 
+    def execute(self, cmd, cwd=None, timeout=None, cpus=None, parameter=None,
+                monitor=None):
+        """Exec a run command directly, keeping output and rusage records."""
+
+        # the tighter of the per-run and the caller (budget) limits applies
+        limits = [ limit for limit in [ self.timeout, timeout ]
+                   if limit is not None and not math.isinf(limit) ]
+        timeout = min(limits) if limits else None
+
+        with open(self.log.logdir + '/' + self.name + '.log', 'a') as log:
+            with timeline.span(cmd, 'run', section = self.name,
+                               parameter = parameter) as args:
+                record = runner.execute(cmd, cwd, log, timeout, cpus, monitor)
+                args['status'] = record.status
+
+        if record.status == runner.FAILED:
+            raise subprocess.CalledProcessError(record.returncode, cmd)
+        if record.status == runner.TIMEOUT:
+            self.log.error('Killed {0} after {1:.2f} seconds'.format(cmd, record.elapsed))
+
+        usage = '{0} took {1:.5f}s, {2:.2f}s user, {3:.2f}s system, {4} KB rss, {5} faults, {6} switches'
+        self.log.debug(usage.format(cmd, record.elapsed, record.user,
+                                    record.system, record.maxrss,
+                                    record.minflt + record.majflt,
+                                    record.nvcsw + record.nivcsw))
+        with self.lock:
+            self.records.append(record)
+            self.parameters.append(parameter)
+        return record
+
+    def warmup(self, cmd, cwd=None):
+        """Run a command the configured number of times without recording it."""
+        with open(self.log.logdir + '/' + self.name + '.log', 'a') as log:
+            for i in range(0, self.warmups):
+                with timeline.span(cmd, 'warmup', section = self.name):
+                    record = runner.execute(cmd, cwd, log, self.timeout)
+                self.log.debug('Warm-up {0} took {1:.5f}s'.format(cmd, record.elapsed))
+
+    def order(self, points):
+        """Return sweep points, shuffled by the recorded seed in quiet mode."""
+        if not self.quiet:
+            return list(points)
+        return environment.order(points, int(self.tags.get('seed', 0)))
+
+    def skip(self, cmd, parameter=None):
+        """Keep a record for a run left out to honor the budget."""
+        self.log.info('Skipping {0} to fit {1} budget'.format(cmd, self.name))
+        record = runner.skip(cmd)
+        with self.lock:
+            self.records.append(record)
+            self.parameters.append(parameter)
+        return record
+
+    def save(self):
+        """Write run records as CSV in the log directory."""
+        with open(self.log.logdir + '/' + self.name + '.csv', 'wb') as data:
+            writer = csv.writer(data)
+            writer.writerow(('parameter',) + runner.Record._fields)
+            for parameter, record in zip(self.parameters, self.records):
+                writer.writerow((parameter,) + record)
         return self
 
+    def measurements(self):
+        """Return (metric, parameter, value) rows of completed runs."""
+        rows = []
+        for parameter, record in zip(self.parameters, self.records):
+            if record.status == runner.OK:
+                for metric in MEASURED:
+                    rows.append((metric, parameter, getattr(record, metric)))
+        return rows
+
+    def export(self):
+        """Return (name, columns) tables of results for the results file."""
+        if not self.records:
+            return []
+        return [ (self.name, results.columns(self.records, self.parameters,
+                                             runner.Record._fields)) ]
+
+    def available(self, *tools):
+        """Check that required tools are installed, log the missing ones."""
+        missing = [ tool for tool in tools
+                    if not distutils.spawn.find_executable(tool) ]
+        for tool in missing:
+            self.log.error('Skipping {0}, {1} not found'.format(self.name, tool))
+        return not missing
+
     def gather(self):
         """Populate section contents."""
         self.log.debug('Empty gather in section named {0}'.format(self.name))
@@ -218,9 +712,13 @@ class Section:
 
 class HardwareSection(Section):
     """Gather hardware information."""
+    keys = []
     def __init__(self):
         """Create hardware section."""
         Section.__init__(self, 'hardware')
+    def inputs(self):
+        """Hardware listing does not depend on the program."""
+        return []
     def gather(self):
         """Gather hardware information."""
 
@@ -248,11 +746,54 @@ class ProgramSection(Section):
 
         return self
 
+class EnvironmentSection(Section):
+    """Gather measurement environment information."""
+    def __init__(self):
+        """Create environment section."""
+        Section.__init__(self, 'environment')
+        self.cores = int(self.tags.get('cores', multiprocessing.cpu_count()))
+        self.snapshot = None
+    def gather(self):
+        """Check frequency scaling, SMT and load, pin threads in quiet mode."""
+
+        # binding applies to every run started from now on
+        if self.quiet:
+            pinned = environment.pin(os.environ)
+            self.log.debug('Pinning threads with {0}'.format(pinned))
+            if not self.tags.get('seed'):
+                self.tags['seed'] = str(random.randint(0, 2 ** 31 - 1))
+
+        state = self.snapshot = environment.snapshot()
+        known = { True: 'yes', False: 'no', None: 'unknown' }
+        self.tags['governor'] = ', '.join(state['governor']) or 'unknown'
+        self.tags['turbo'] = known[state['turbo']]
+        self.tags['smt'] = known[state['smt']]
+        if state['load']:
+            self.tags['load'] = '%.2f' % state['load'][0]
+            self.tags['load-averages'] = ', '.join([ '%.2f' % value for value in state['load'] ])
+        self.tags['pinning'] = ', '.join([ '{0}={1}'.format(name, value)
+                                           for name, value in sorted(state['pinning'].items())
+                                           if value ]) or 'none'
+
+        warnings = environment.warnings(state, self.cores)
+        self.tags['noisy'] = ', '.join(warnings) or 'none'
+        for warning in warnings:
+            if self.quiet:
+                self.log.error('Measurements may be noisy: {0}'.format(warning))
+            else:
+                self.log.debug('Measurements may be noisy: {0}'.format(warning))
+
+        return self
+
 class SoftwareSection(Section):
     """Gather software information."""
+    keys = []
     def __init__(self):
         """Create program section."""
-        Section.__init__(self, 'software')        
+        Section.__init__(self, 'software')
+    def inputs(self):
+        """Toolchain versions do not depend on the program."""
+        return []
     def gather(self):
         """Get compiler and C library version."""
 
@@ -266,28 +807,95 @@ class SoftwareSection(Section):
 
 class SanitySection(Section):
     """Gather sanity information."""
+    keys = [ 'build', 'clean', 'run', 'cores', 'first', 'dir' ]
     def __init__(self):
         """Create sanity section."""
         Section.__init__(self, 'sanity')
-        self.dir = 'cd {0}'.format(self.tags['dir'])
-        self.build = self.tags['build'].format('-O3')
         self.run = self.tags['run']
         self.cores = self.tags['cores']
         self.first = self.tags['first']
         self.program = self.tags['program']
+    def variants(self):
+        """Sanity runs the optimized build."""
+        return [ ('-O3', None) ]
     def gather(self):
         """Build and run the program using a small input size."""
-        test = ' && '.join([ self.dir,
-                             self.build,
+        test = ' && '.join([ 'cd {0}'.format(self.variant('-O3')),
                              self.run.format(self.cores,
                                              self.first,
-                                             self.program),
-                             'cd -'])
+                                             self.program) ])
         self.command(test)
         return self
 
+class SizingSection(Section):
+    """Choose problem sizes fitting the sweep budget."""
+    exclusive = True
+    compiled = True
+    keys = [ 'sweep-budget', 'points', 'probe', 'build', 'cflags', 'clean', 'run',
+             'cores', 'dir' ]
+    def __init__(self):
+        """Create sizing section."""
+        Section.__init__(self, 'sizing')
+
+        self.run = self.tags['run']
+        self.cores = self.tags['cores']
+        self.program = self.tags['program']
+        self.budget = float(self.tags.get('sweep-budget', 60))
+        self.points = int(self.tags.get('points', 8))
+        self.probe = int(self.tags.get('probe', 16))
+
+    def gather(self):
+        """Probe growing sizes, fit a runtime model and plan the sweep."""
+
+        import sizing
+
+        directory = self.variant()
+
+        # double the size until enough probes rise above timer noise
+        sizes = []
+        times = []
+        size = self.probe
+        while len(sizes) < PROBES and sum(times) < self.budget / 4:
+            cmd = self.run.format(self.cores, size, self.program)
+            elapsed = self.execute(cmd, directory, parameter=size).elapsed
+            sizes.append(size)
+            times.append(elapsed)
+            self.log.debug("Probe at {0} took {1:.5f} seconds".format(size, elapsed))
+            measured = [ (s, t) for s, t in zip(sizes, times) if t >= NOISE ]
+            if len(measured) >= 3:
+                break
+
+            # never probe a size expected to exceed a sweep point share
+            size *= 2
+            if len(measured) >= 2:
+                model = sizing.fit(*zip(*measured))
+                if sizing.predict(model, size) > self.budget / self.points:
+                    break
+        self.save()
+
+        measured = [ (s, t) for s, t in zip(sizes, times) if t >= NOISE ]
+        first = last = increment = sizes[-1]
+        try:
+            if len(measured) < 2:
+                raise ValueError('runtime stays below timer noise')
+            model = sizing.fit(*zip(*measured))
+            first, last, increment = sizing.plan(model, self.budget, self.points)
+            self.tags['model'] = 't = {0:.3g} * N^{1:.3f}'.format(*model)
+            self.log.debug('Fitted runtime model {0}'.format(self.tags['model']))
+        except ValueError as error:
+            self.log.error('Could not model runtime, {0}'.format(error))
+
+        self.tags['first'] = str(first)
+        self.tags['last'] = str(last)
+        self.tags['increment'] = str(increment)
+        self.log.info('Chose range {0},{1},{2} for a {3} seconds sweep'.format(first, last, increment, self.budget))
+
+        return self
+
 class BenchmarkSection(Section):
     """Gather benchmark information."""
+    exclusive = True
+    keys = []
     def __init__(self):
         """Create benchmark section."""
         Section.__init__(self, 'benchmark')
@@ -296,7 +904,8 @@ class BenchmarkSection(Section):
         # TBD: make this a tag
         cores = str(multiprocessing.cpu_count())
         mpirun = 'mpirun -np {0} `which hpcc` && cat hpccoutf.txt'
-        output = self.command(mpirun.format(cores)).output
+        # a measurement of the machine, never answered from the cache
+        output = self.command(mpirun.format(cores), cache=False).output
 
         metrics = [ ('success', r'Success=(\d+.*)', None),
                     ('hpl', r'HPL_Tflops=(\d+.*)', 'TFlops'),
@@ -320,172 +929,831 @@ class BenchmarkSection(Section):
 
 class WorkloadSection(Section):
     """Gather workload information."""
+    exclusive = True
+    compiled = True
+    keys = [ 'run', 'cores', 'first', 'dir', 'count', 'precision',
+             'confidence', 'min-count', 'max-count', 'budget',
+             'rerun-outliers', 'build', 'clean', 'cflags', 'quiet', 'warmup' ]
     def __init__(self):
         """Create workload section."""
         Section.__init__(self, 'workload')
 
         self.count = self.tags['count']
+        self.precision = float(self.tags.get('precision', 0.02))
+        self.confidence = float(self.tags.get('confidence', 0.95))
+        self.minimum = int(self.tags.get('min-count', 5))
+        self.maximum = int(self.tags.get('max-count', 100))
+        self.budget = float(self.tags.get('budget', 'inf'))
+        self.rerun = self.tags.get('rerun-outliers', 'no').lower() in BOOLEANS
         self.run = self.tags['run']
         self.cores = self.tags['cores']
         self.first = self.tags['first']
         self.program = self.tags['program']
-        self.dir = self.tags['dir']
-        
+        self.outliers = None
+
     def gather(self):
         """Run program multiple times, check geomean and deviation."""
 
-        # TODO: compile before running
+        import numpy
+        import scipy.stats
+        import stats
+
+        directory = self.variant()
+
+        # with count=auto, repeat until the geomean is precise enough
+        adaptive = self.count == 'auto'
+        if adaptive:
+            count = self.maximum
+        else:
+            count = int(self.count)
 
-        outputs = []
         times = []
-        for i in range(0, int(self.count)):
-            start = time.time()
-            cmd = ' && '.join([ 'cd {0}'.format(self.dir),
-                                self.run.format(self.cores,
-                                                self.first,
-                                                self.program),
-                                'cd -' ])
-
-            output = self.command(cmd)
-
-            end = time.time()
-            elapsed = end - start
-            times.append(elapsed)
-            outputs.append(output)
-            self.log.debug("Control {0} took {1:.2f} seconds".format(i, elapsed))
+        spent = 0.0
+        width = float('inf')
+        self.warmup(self.run.format(self.cores, self.first, self.program), directory)
+        for i in range(0, count):
+            cmd = self.run.format(self.cores, self.first, self.program)
+            record = self.execute(cmd, directory, self.budget - spent,
+                                  parameter=i)
+            spent += record.elapsed
+            self.log.debug("Control {0} took {1:.2f} seconds".format(i, record.elapsed))
+            if record.status == runner.OK:
+                times.append(record.elapsed)
+
+            if len(times) >= 2:
+                geomean, width = stats.geointerval(times, self.confidence)
+            if spent >= self.budget:
+                self.log.info("Workload budget of {0} seconds exhausted".format(self.budget))
+                break
+            if adaptive and len(times) >= self.minimum and width <= self.precision:
+                break
+
+        if not times:
+            raise RuntimeError('No workload run completed in time')
 
         array = numpy.array(times)
+        mask = stats.outliers(array)
+
+        # outliers get a second chance, kept only if they look normal now
+        if self.rerun and mask.any():
+            for i in numpy.flatnonzero(mask):
+                cmd = self.run.format(self.cores, self.first, self.program)
+                record = self.execute(cmd, directory, parameter=i)
+                if record.status == runner.OK:
+                    array[i] = record.elapsed
+            mask = stats.outliers(array)
+        self.save()
+
+        precision = "Needed {0} runs for {1:.2%} precision at {2:.0%} confidence"
+        self.log.debug(precision.format(len(times), width, self.confidence))
+        self.tags['runs'] = str(len(times))
+        self.tags['achieved-precision'] = "%.5f" % width
+
+        flagged = [ '{0} ({1:.5f}s)'.format(i, array[i])
+                    for i in numpy.flatnonzero(mask) ]
+        self.tags['outliers'] = ', '.join(flagged) or 'none'
+        self.log.debug('Outliers: {0}'.format(self.tags['outliers']))
+        self.outliers = mask
+
+        # summary numbers leave outliers out
+        kept = array[~mask]
         deviation = "Deviation: gmean {0:.2f} std {1:.2f}"
-        self.log.debug(deviation.format(scipy.stats.gmean(array), numpy.std(array)))
-
-        self.tags['geomean'] = "%.5f" % scipy.stats.gmean(array)
-        self.tags['stddev'] = "%.5f" % numpy.std(array)
-
-        self.tags['max'] = "%.5f" % numpy.max(array)
-        self.tags['min'] = "%.5f" % numpy.min(array)
-
-        number = math.ceil(math.sqrt(int(self.tags['count'])))
-
-        buckets, bins, patches = matplotlib.pyplot.hist(times,
-                                                        bins=number,
-                                                        normed=True)
-        matplotlib.pyplot.plot(bins, 
-                               scipy.stats.norm.pdf(bins,
-                                                    loc = numpy.mean(array),
-                                                    scale = array.std()),
-                               'r--')
-        matplotlib.pyplot.xlabel('time in seconds')
-        matplotlib.pyplot.ylabel('ocurrences in units')
-        matplotlib.pyplot.title('histogram')
-        matplotlib.pyplot.grid(True)  
-        matplotlib.pyplot.savefig('hist.pdf', bbox_inches=0)
-        matplotlib.pyplot.clf()
-        Log().debug("Plotted histogram")
+        self.log.debug(deviation.format(scipy.stats.gmean(kept), numpy.std(kept)))
+
+        self.tags['geomean'] = "%.5f" % scipy.stats.gmean(kept)
+        self.tags['average'] = "%.5f" % numpy.mean(kept)
+        self.tags['stddev'] = "%.5f" % numpy.std(kept)
+
+        self.tags['max'] = "%.5f" % numpy.max(kept)
+        self.tags['min'] = "%.5f" % numpy.min(kept)
+
+        median, mad = stats.robust(array)
+        low, high = stats.bootstrap(kept, confidence=self.confidence)
+        self.tags['median'] = "%.5f" % median
+        self.tags['mad'] = "%.5f" % mad
+        self.tags['bootstrap'] = "%.5f - %.5f" % (low, high)
+        self.tags['noise'] = stats.noise(array)
+
+        cpu = [ record.user + record.system for record in self.records ]
+        self.tags['cpu'] = "%.5f" % numpy.mean(cpu)
+        self.tags['maxrss'] = str(max([ r.maxrss for r in self.records ]))
+
+        number = int(math.ceil(math.sqrt(len(times))))
+        bins = numpy.linspace(array.min(), array.max(), number + 1)
+
+        plot = self.figure(plots.Plot('hist', 'histogram', 'time in seconds',
+                                      'ocurrences in units', 'upper right'))
+        plot.hist([ kept, array[mask] ],
+                  bins=bins,
+                  density=True,
+                  stacked=True,
+                  color=[ 'blue', 'red' ],
+                  label=[ 'kept', 'outliers' ])
+        plot.line(bins,
+                  scipy.stats.norm.pdf(bins,
+                                       loc = numpy.mean(kept),
+                                       scale = kept.std()),
+                  'r--')
+        for fence in stats.fences(array):
+            plot.vline(fence, color='gray', linestyle=':')
+        Log().debug("Queued histogram")
 
         return self
 
-# TODO: detect/report outliers
-
 class ScalingSection(Section):
     """Gather scaling information."""
+    exclusive = True
+    compiled = True
+    keys = [ 'first', 'last', 'increment', 'run', 'cores', 'dir', 'cflags',
+             'clean', 'build', 'budget', 'sweep-cores', 'isolate', 'quiet',
+             'warmup' ]
     def __init__(self):
         """."""
         # TODO: first, last, increment should be read from self.tags
         Section.__init__(self, 'scaling')
 
-        self.tags = Tags().tags
         self.first = self.tags['first']
         self.last = self.tags['last']
         self.increment = self.tags['increment']
         self.run = self.tags['run']
         self.cores = self.tags['cores']
-        self.size = self.tags['size']
         self.program = self.tags['program']
-        self.dir = self.tags['dir']
-        self.cflags = self.tags['cflags']
-        self.clean = self.tags['clean']
-        self.build = self.tags['build']
+        self.budget = float(self.tags.get('budget', 'inf'))
+        self.threads = self.tags.get('sweep-cores', self.cores)
+        self.isolate = self.tags.get('isolate', 'no').lower() in BOOLEANS
+        self.started = None
+        self.directory = None
+
+    def point(self, size, data, status, slots=None):
+        """Run one size unless it cannot fit the remaining budget."""
+
+        import sizing
+
+        cmd = self.run.format(self.threads, size, self.program)
+        spent = runner.clock() / 1e9 - self.started
+
+        # extrapolate from completed sizes to skip what cannot fit
+        with self.lock:
+            done = [ (x, data[x]) for x in sorted(data)
+                     if status[x] == runner.OK ]
+        expected = 0.0
+        if len(done) >= 2:
+            expected = sizing.predict(sizing.fit(*zip(*done)), size)
+        if spent + expected > self.budget or spent >= self.budget:
+            with self.lock:
+                data[size] = expected if expected else float('nan')
+                status[size] = self.skip(cmd, size).status
+            return
+
+        cpus = slots.get() if slots else None
+        try:
+            record = self.execute(cmd, self.directory, self.budget - spent, cpus,
+                                  size)
+        finally:
+            if slots:
+                slots.put(cpus)
+
+        with self.lock:
+            data[size] = record.elapsed
+            status[size] = record.status
+        self.log.debug("Problem at {0} took {1:.2f} seconds".format(size, record.elapsed))
 
     def gather(self):
-        """Run program."""
+        """Run program at growing sizes within the time budget."""
 
-        cleanup = 'cd {0}; {1}; {2}'.format(self.dir,
-                                            self.clean,
-                                            self.build.format(self.cflags))
-        subprocess.check_output(cleanup, shell = True)
+        self.directory = self.variant()
 
         data = {}
-        outputs = []
-
-        for size in range(int(self.first),
-                          int(self.last) + 1,
-                          int(self.increment)):
-            start = time.time()
-            output = self.command(' && '.join([ 'cd {0}'.format(self.dir), self.run.format(self.cores, self.size, self.program), 'cd -' ]))
-            end = time.time()
-            outputs.append(output)
-            elapsed = end - start
-            data[size] = elapsed
-            self.log.debug("Problem at {0} took {1:.2f} seconds".format(self.size, elapsed))
-        array = numpy.array(data.values())
-
-# TODO: kill execution if time takes more than a limit
+        status = {}
+        sizes = self.order(range(int(self.first), int(self.last) + 1,
+                                 int(self.increment)))
+        self.warmup(self.run.format(self.threads, sizes[0], self.program),
+                    self.directory)
+        self.started = runner.clock() / 1e9
+
+        # narrow points run concurrently, each pinned to its own cores
+        sets = []
+        if not self.isolate:
+            sets = cpusets.partition(self.threads)
+
+        if len(sets) > 1:
+            self.log.debug('Sweeping on {0} disjoint sets of {1} cores'.format(len(sets), self.threads))
+            slots = Queue.Queue()
+            for cpus in sets:
+                slots.put(cpus)
+            pool = multiprocessing.pool.ThreadPool(len(sets))
+            try:
+                pool.map(lambda size: self.point(size, data, status, slots),
+                         sizes)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for size in sizes:
+                self.point(size, data, status)
+        self.save()
 
         xvalues = data.keys()
         xvalues.sort()
 
-        matplotlib.pyplot.plot(data.values())
-        matplotlib.pyplot.xlabel('problem size in bytes')
-        matplotlib.pyplot.xticks(range(0, len(data.values())), xvalues)
-        matplotlib.pyplot.grid(True)  
+        for state in [ runner.TIMEOUT, runner.SKIPPED ]:
+            sizes = [ str(x) for x in xvalues if status[x] == state ]
+            self.tags['scaling-{0}'.format(state)] = ', '.join(sizes) or 'none'
+
+        # killed runs show when they were killed, skipped ones the prediction
+        positions = range(0, len(xvalues))
+        completed = [ data[x] if status[x] == runner.OK else float('nan')
+                      for x in xvalues ]
+        plot = self.figure(plots.Plot('data', 'data size scaling',
+                                      'problem size in bytes', 'time in seconds',
+                                      'upper left'))
+        plot.line(positions, completed, 'b-o', label='completed')
+        for state, marker, color in [ (runner.TIMEOUT, 'x', 'red'),
+                                      (runner.SKIPPED, 'o', 'gray') ]:
+            marked = [ (p, data[x]) for p, x in zip(positions, xvalues)
+                       if status[x] == state ]
+            if marked:
+                xs, ys = zip(*marked)
+                plot.line(xs, ys, linestyle = 'None',
+                          marker = marker, color = color,
+                          label = state)
+        plot.xticks(positions, xvalues)
+        self.log.debug("Queued problem scaling plot")
+
+        return self
 
-# TODO: add problem size as labels in X axis
+class ThreadsSection(Section):
+    """Gather thread scaling information."""
+    exclusive = True
+    compiled = True
+    keys = [ 'run', 'cores', 'last', 'dir', 'budget', 'build', 'clean', 'cflags',
+             'quiet', 'warmup' ]
+    def __init__(self):
+        """Create thread scaling section."""
+        Section.__init__(self, 'threads')
+
+        self.run = self.tags['run']
+        self.cores = self.tags['cores']
+        self.last = self.tags['last']
+        self.program = self.tags['program']
+        self.budget = float(self.tags.get('budget', 'inf'))
+
+    def gather(self):
+        """Run program using from one thread up to all cores."""
+
+        import numpy
+        import scaling
+
+        directory = self.variant()
+        procs = {}
+        spent = 0.0
+        cores = self.order(range(1, int(self.cores) + 1))
+        self.warmup(self.run.format(cores[0], self.last, self.program), directory)
+        for core in cores:
+            cmd = self.run.format(core, self.last, self.program)
+            if spent >= self.budget:
+                self.skip(cmd, core)
+                procs[core] = float('nan')
+                continue
+            record = self.execute(cmd, directory, self.budget - spent,
+                                  parameter=core)
+            spent += record.elapsed
+            if record.status == runner.OK:
+                procs[core] = record.elapsed
+            else:
+                procs[core] = float('nan')
+            self.log.debug("Threads at {0} took {1:.2f} seconds".format(core, record.elapsed))
+        self.save()
+
+        threads = numpy.arange(1, int(self.cores) + 1)
+        times = numpy.array([ procs[core] for core in sorted(procs) ])
+        valid = numpy.isfinite(times)
+
+        plot = self.figure(plots.Plot('procs', 'thread count scaling',
+                                      'cores in units', 'time in seconds',
+                                      'upper right'))
+        plot.line(threads, times, 'b-o', label="actual")
+
+        # without a single thread time there is nothing to scale from
+        if not valid[0] or valid.sum() < 2:
+            self.log.error('Not enough thread counts completed to fit scaling models')
+            for tag in [ 'serial', 'parallel', 'serial-interval', 'amdalah',
+                         'gustafson', 'karp-flatt', 'usl', 'optimal' ]:
+                self.tags[tag] = 'Unknown'
+        else:
+            self.laws(threads[valid], times[valid])
+            plot.line(threads, times[0] / threads, 'g:',
+                      label="ideal")
+            single, serial = self.amdahl['single'], self.amdahl['serial']
+            plot.line(threads,
+                      single * (serial + (1 - serial) / threads),
+                      'r--', label="amdahl")
+            if self.usl is not None:
+                plot.line(threads,
+                          times[0] / scaling.predict(self.usl, threads),
+                          'm-.', label="usl")
+        plot.xticks(threads)
+        self.log.debug("Queued thread scaling plot")
+
+        return self
+
+    def laws(self, threads, times):
+        """Fit scaling models over every completed thread count."""
+
+        import numpy
+        import scaling
+
+        amdahl = self.amdahl = scaling.amdahl(threads, times)
+        serial = amdahl['serial']
+        self.tags['serial'] = "%.5f" % serial
+        self.tags['parallel'] = "%.5f" % (1 - serial)
+        self.tags['serial-interval'] = "%.5f - %.5f" % amdahl['interval']
+        self.tags['amdalah'] = "%.5f" % (1 / (serial + (1 - serial) / LIMIT))
+
+        gustafson = scaling.gustafson(threads, times)
+        self.tags['gustafson'] = "%.5f" % (LIMIT - gustafson['serial'] * (LIMIT - 1))
+        self.tags['gustafson-serial'] = "%.5f" % gustafson['serial']
+
+        p, fractions = scaling.karpflatt(threads, times)
+        self.tags['karp-flatt'] = ', '.join([ '{0}: {1:.5f}'.format(int(x), e)
+                                              for x, e in zip(p, fractions) ])
+
+        # contention and coherency need a third point to be told apart
+        self.usl = None
+        if len(threads) >= 3:
+            usl = self.usl = scaling.usl(threads, times)
+            self.tags['usl'] = 'sigma {0:.5f} ({1:.5f} - {2:.5f}), kappa {3:.6f} ({4:.6f} - {5:.6f})'.format(
+                usl['sigma'], usl['sigma-interval'][0], usl['sigma-interval'][1],
+                usl['kappa'], usl['kappa-interval'][0], usl['kappa-interval'][1])
+            optimal = usl['optimal']
+            self.tags['optimal'] = 'unbounded' if numpy.isinf(optimal) else '%.0f' % optimal
+        else:
+            self.tags['usl'] = 'Unknown'
+            self.tags['optimal'] = 'Unknown'
+
+        self.log.debug("Computed scaling laws")
+        return self
+
+class OptimizationSection(Section):
+    """Gather compiler optimization information."""
+    exclusive = True
+    keys = [ 'build', 'clean', 'run', 'cores', 'first', 'dir', 'compilers',
+             'quiet', 'warmup' ]
+    def __init__(self):
+        """Create optimization section."""
+        Section.__init__(self, 'optimization')
+
+        self.run = self.tags['run']
+        self.cores = self.tags['cores']
+        self.first = self.tags['first']
+        self.program = self.tags['program']
+
+        # the compiler make picks by default unless a sweep is configured
+        names = [ name.strip() for name in self.tags.get('compilers', '').split(',')
+                  if name.strip() ]
+        self.compilers = [ name for name in names
+                           if distutils.spawn.find_executable(name) ] or [ None ]
+        for name in set(names) - set(self.compilers):
+            self.log.error('Skipping compiler {0}, not found'.format(name))
+
+    def variants(self):
+        """Return every optimization level of every compiler."""
+        return [ ('-O{0}'.format(opt), compiler)
+                 for compiler in self.compilers for opt in range(0, 4) ]
+
+    def gather(self):
+        """Run the program built at every optimization level."""
+
+        # builds were prepared together, only the runs are timed here
+        cmd = self.run.format(self.cores, self.first, self.program)
+        opts = {}
+        for flags, compiler in self.order(self.variants()):
+            name = compiler or 'default'
+            directory = self.variant(flags, compiler)
+            self.warmup(cmd, directory)
+            record = self.execute(cmd, directory,
+                                  parameter = '{0} {1}'.format(name, flags))
+            opts.setdefault(name, {})[flags] = record.elapsed
+            optimizations = "Optimizations at {0} {1} took {2:.2f} seconds"
+            self.log.debug(optimizations.format(name, flags, record.elapsed))
+        self.save()
+
+        plot = self.figure(plots.Plot('opts', 'optimization levels',
+                                      'optimization level', 'time in seconds',
+                                      'upper right' if len(opts) > 1 else None))
+        for name, times in sorted(opts.items()):
+            plot.line(range(0, len(times)), [ times[flags] for flags in sorted(times) ],
+                      '-o', label = name)
+        plot.xticks(range(0, 4), [ '-O{0}'.format(opt) for opt in range(0, 4) ])
+        self.log.debug("Queued optimizations plot")
 
-        matplotlib.pyplot.ylabel('time in seconds')
-        matplotlib.pyplot.title('data size scaling')
-        matplotlib.pyplot.savefig('data.pdf', bbox_inches=0)
-        matplotlib.pyplot.clf()
-        self.log.debug("Plotted problem scaling")
-        
         return self
-        
 
 class ProfileSection(Section):
     """Gather performance profile information."""
+    keys = [ 'build', 'clean', 'run', 'cores', 'first', 'dir', 'top',
+             'call-graph' ]
+    kept = [ 'lines' ]
     def __init__(self):
         """Create profile section."""
         Section.__init__(self, 'profile')
+        self.count = int(self.tags.get('top', 10))
+        self.mode = self.tags.get('call-graph', 'fp')
+        self.lines = []
+    def variants(self):
+        """Profiles sample the optimized build with frame pointers."""
+        if 'build' not in self.tags:
+            return []
+        return [ (PROFILED, None) ]
     def gather(self):
-        """Run gprof and gather results."""
+        """Sample call stacks with perf, fold them and find hot spots."""
+
+        if 'program' not in self.tags or not self.available('perf'):
+            return self
+
+        cd = 'cd {0}'.format(self.variant(PROFILED))
+        run = self.tags['run'].format(self.tags['cores'],
+                                      self.tags['first'],
+                                      self.tags['program'])
+        data = self.log.logdir + '/perf.data'
+
+        record = flamegraph.record(run, data, self.mode) + ' >&2'
+        script = 'perf script -F comm,ip,sym -i {0}'.format(data)
+        cmd = ' && '.join([ cd, record, script ])
+        folded = flamegraph.fold(self.stream(cmd, cache=False))
+
+        hot = 'perf report --stdio --no-children --sort srcline -g none -i {0}'
+        self.lines = flamegraph.report(self.stream(' && '.join([ cd, hot.format(data) ]),
+                                                   cache=False),
+                                       self.count)
+
+        if not folded:
+            self.log.error('No samples recorded for {0}'.format(self.tags['program']))
+            return self
+
+        with open(self.log.logdir + '/profile.folded', 'w') as log:
+            for stack, samples in sorted(folded.items()):
+                log.write('{0} {1}\n'.format(stack, samples))
+        self.figure(flamegraph.plot(folded))
+
+        rows = [ '{0:>8} {1:>8}  {2}'.format('self', 'total', 'function') ]
+        for name, own, total in flamegraph.top(folded, self.count):
+            rows.append('{0:>8.2%} {1:>8.2%}  {2}'.format(own, total, name))
+        self.tags['profile'] = '\n'.join(rows)
+
+        rows = [ '{0:>8}  {1}'.format('self', 'line') ]
+        for share, line in self.lines:
+            rows.append('{0:>8.2%}  {1}'.format(share, line))
+        self.tags['annotation'] = '\n'.join(rows)
+        self.tags['samples-profile'] = str(sum(folded.values()))
+        self.log.debug("Profiling report completed")
+
         return self
 
 class ResourcesSection(Section):
     """Gather system resources information."""
+    exclusive = True
+    compiled = True
+    keys = [ 'run', 'cores', 'last', 'dir', 'sample-rate', 'sample-size',
+             'build', 'clean', 'cflags' ]
+    kept = [ 'samples' ]
     def __init__(self):
         """Create resources section."""
         Section.__init__(self, 'resources')
+        self.rate = float(self.tags.get('sample-rate', 50))
+        self.capacity = int(self.tags.get('sample-size', 65536))
+        self.samples = None
     def gather(self):
-        """Run program under pidstat."""
+        """Run program sampling its /proc counters."""
+
+        import numpy
+        import sampler
+
+        if 'program' not in self.tags:
+            return self
+
+        cmd = self.tags['run'].format(self.tags['cores'],
+                                      self.tags['last'],
+                                      self.tags['program'])
+        probe = sampler.Sampler(self.rate, self.capacity)
+        self.execute(cmd, self.variant(), monitor = probe)
+        self.save()
+
+        data = self.samples = probe.samples()
+        numpy.savetxt(self.log.logdir + '/resources.log', data, fmt = '%.6g',
+                      delimiter = ',', header = ','.join(sampler.FIELDS),
+                      comments = '')
+        self.tags['samples'] = str(len(data))
+        self.log.debug("Sampled {0} rows at {1} Hz".format(len(data), self.rate))
+        if len(data) < 2:
+            self.log.error('Not enough resource samples to plot')
+            return self
+
+        column = dict([ (field, i) for i, field in enumerate(sampler.FIELDS) ])
+        times, deltas = sampler.rates(data)
+        usage = 100 * deltas[:, column['cpu']]
+        self.tags['cpu-peak'] = '%.2f' % numpy.nanmax(usage)
+        self.tags['rss-peak'] = '%.0f' % numpy.nanmax(data[:, column['rss']])
+
+        figures = [ ('CPU', [ (times, usage, 'cpu') ],
+                     'percentage of one core', 'cpu usage'),
+                    ('MEM', [ (data[:, 0], data[:, column['rss']] / 1024, 'rss') ],
+                     'resident set in MB', 'memory usage'),
+                    ('IO', [ (times, deltas[:, column['read']] / 1024, 'read'),
+                             (times, deltas[:, column['write']] / 1024, 'write') ],
+                     'KB per second', 'disk usage'),
+                    ('FAULTS', [ (times, deltas[:, column['minflt']], 'minor'),
+                                 (times, deltas[:, column['majflt']], 'major') ],
+                     'faults per second', 'page faults') ]
+        for name, lines, ylabel, title in figures:
+            plot = self.figure(plots.Plot(name, title, 'time in seconds', ylabel,
+                                          'upper right'))
+            for x, y, label in lines:
+                plot.line(x, y, label = label)
+
+        self.log.debug("Queued resource usage plots")
+
         return self
 
+    def export(self):
+        """Add the sampled time series, one column per field."""
+        import sampler
+
+        tables = Section.export(self)
+        if self.samples is not None:
+            tables.append(('resources-samples',
+                           dict([ (field, self.samples[:, i])
+                                  for i, field in enumerate(sampler.FIELDS) ])))
+        return tables
+
 class VectorizationSection(Section):
     """Gather vectorization information."""
+    keys = [ 'build', 'clean', 'dir', 'top' ]
+    kept = [ 'index' ]
     def __init__(self):
         """Create vectorization section."""
         Section.__init__(self, 'vectorization')
+        self.count = int(self.tags.get('top', 10))
+        self.index = {}
+    def flags(self):
+        """Return remark flags for the compiler make uses."""
+        compiler = os.environ.get('CC', 'cc')
+        version = self.command('{0} --version'.format(compiler)).output
+        return vectorization.flags(version)
+    def variants(self):
+        """Vectorization reads the remarks of its own build."""
+        if 'program' not in self.tags or 'build' not in self.tags:
+            return []
+        return [ (self.flags(), None) ]
     def gather(self):
-        """Run oprofile."""
+        """Build with vectorizer remarks enabled and index them per loop."""
+
+        if 'program' not in self.tags:
+            return self
+
+        # remarks can be large, they are parsed as the log is read
+        with self.builder().output(self.flags()) as output:
+            self.index = vectorization.parse(output)
+
+        rows = []
+        for key, loop in sorted(self.index.items(),
+                                key = lambda item: (item[1].file, item[1].line)):
+            state = 'vectorized' if loop.vectorized else 'missed'
+            rows.append('{0:<24} {1:<10} {2}'.format(key, state, '; '.join(loop.reasons)))
+        self.tags['vectorizer'] = '\n'.join(rows)
+        self.tags['vectorized'] = str(len([ l for l in self.index.values() if l.vectorized ]))
+        self.tags['missed'] = str(len([ l for l in self.index.values() if not l.vectorized ]))
+        self.log.debug("Vectorization report completed")
+
+        return self
+
+    def rank(self, hot):
+        """List the hottest loops left scalar given (share, file:line) profile lines."""
+
+        rows = [ '{0:>8}  {1:<24} {2}'.format('self', 'loop', 'reason') ]
+        for share, loop in vectorization.join(self.index, hot):
+            if not loop.vectorized and len(rows) <= self.count:
+                rows.append('{0:>8.2%}  {1:<24} {2}'.format(share,
+                                                            '{0}:{1}'.format(loop.file, loop.line),
+                                                            '; '.join(loop.reasons) or 'unknown'))
+        self.tags['hot-missed'] = '\n'.join(rows)
+        self.log.debug("Ranked {0} missed loops by profile hotness".format(len(rows) - 1))
+
         return self
 
 class CountersSection(Section):
     """Gather hardware counters information."""
+    exclusive = True
+    compiled = True
+    keys = [ 'run', 'cores', 'first', 'last', 'increment', 'dir', 'build',
+             'clean', 'cflags' ]
+    kept = [ 'table' ]
     def __init__(self):
         """Create hardware counters section."""
         Section.__init__(self, 'counters')
+        self.table = {}
+    def gather(self):
+        """Run program once per event group and size, derive counter metrics."""
+
+        import numpy
+
+        if 'program' not in self.tags or not self.available('perf'):
+            return self
+
+        directory = self.variant()
+        sizes = range(int(self.tags['first']), int(self.tags['last']) + 1,
+                      int(self.tags['increment']))
+        handle, output = tempfile.mkstemp(suffix = '.perf')
+        os.close(handle)
+
+        multiplexed = set()
+        try:
+            for size in sizes:
+                run = self.tags['run'].format(self.tags['cores'], size,
+                                              self.tags['program'])
+                events = {}
+                elapsed = []
+                for group in counters.GROUPS:
+                    record = self.execute(counters.wrap(run, group, output),
+                                          directory, parameter = size)
+                    if record.status != runner.OK:
+                        continue
+                    text = open(output).read()
+                    with open(self.log.logdir + '/counters.log', 'a') as log:
+                        log.write(text)
+                    found = counters.parse(text)
+                    multiplexed.update(counters.multiplexed(found))
+                    events.update(found)
+                    elapsed.append(record.elapsed)
+                if elapsed:
+                    metrics = counters.derive(events, numpy.median(elapsed))
+                    metrics.update(dict([ (event, value) for event, (value, running)
+                                          in events.items() ]))
+                    self.table[size] = metrics
+                self.log.debug("Counters at {0} measured {1} events".format(size, len(events)))
+        finally:
+            os.remove(output)
+        self.save()
+
+        if multiplexed:
+            self.log.error('Multiplexed counters: {0}'.format(', '.join(sorted(multiplexed))))
+
+        columns = [ 'ipc', 'branch-miss-rate', 'cache-miss-rate',
+                    'l1-miss-rate', 'llc-miss-rate', 'bandwidth' ]
+        with open(self.log.logdir + '/counters.csv', 'wb') as data:
+            writer = csv.writer(data)
+            names = sorted(set([ name for metrics in self.table.values()
+                                 for name in metrics ]))
+            writer.writerow([ 'size' ] + names)
+            for size in sorted(self.table):
+                writer.writerow([ size ] + [ self.table[size].get(name) for name in names ])
+
+        lines = [ '{0:>8} '.format('size') + ' '.join([ '{0:>16}'.format(column) for column in columns ]) ]
+        for size in sorted(self.table):
+            lines.append('{0:>8} '.format(size) + ' '.join([ '{0:>16.4f}'.format(self.table[size][column])
+                                                           for column in columns ]))
+        self.tags['counters'] = '\n'.join(lines)
+        self.tags['multiplexed'] = ', '.join(sorted(multiplexed)) or 'none'
+
+        self.log.debug("Hardware counters gathering completed")
+
+        return self
+
+    def export(self):
+        """Add derived metrics, one row per size."""
+        tables = Section.export(self)
+        if self.table:
+            sizes = sorted(self.table)
+            names = sorted(set([ name for metrics in self.table.values()
+                                 for name in metrics ]))
+            data = { 'size': [ float(size) for size in sizes ] }
+            for name in names:
+                data[name] = [ self.table[size].get(name, float('nan'))
+                               for size in sizes ]
+            tables.append(('counters-metrics', data))
+        return tables
+
+    def measurements(self):
+        """Return derived counter metrics per size."""
+        import numpy
+        rows = []
+        for size, metrics in sorted(self.table.items()):
+            for metric, value in sorted(metrics.items()):
+                if not numpy.isnan(value):
+                    rows.append((metric, size, value))
+        return rows
+
+class HostsSection(Section):
+    """Gather workload, scaling and thread sweeps on remote workers."""
+    exclusive = True
+    compiled = True
+    keys = [ 'workers', 'run', 'first', 'last', 'increment', 'count',
+             'min-count', 'dir', 'build', 'clean', 'cflags' ]
+    kept = [ 'results' ]
+    def __init__(self):
+        """Create hosts section."""
+        Section.__init__(self, 'hosts')
+        self.workers = [ name.strip() for name in self.tags.get('workers', '').split(',')
+                         if name.strip() ]
+        self.results = {}
+    def variants(self):
+        """Workers run the default build, only needed if any is registered."""
+        return Section.variants(self) if self.workers else []
+    def plan(self, info):
+        """Return run specs of the sweeps sized for a worker host."""
+
+        # workers share the build directory through a common file system
+        directory = os.path.abspath(self.variant())
+        run = self.tags['run']
+        program = self.tags['program']
+        first = int(self.tags['first'])
+        last = int(self.tags['last'])
+        count = self.tags.get('count', '8')
+        if count == 'auto':
+            count = self.tags.get('min-count', 5)
+
+        specs = [ worker.spec(run.format(info['cores'], first, program),
+                              directory, repetitions = int(count),
+                              timeout = self.timeout, kind = 'workload',
+                              parameter = first) ]
+        for size in range(first, last + 1, int(self.tags['increment'])):
+            specs.append(worker.spec(run.format(info['cores'], size, program),
+                                     directory, timeout = self.timeout,
+                                     kind = 'scaling', parameter = size))
+        for core in range(1, info['cores'] + 1):
+            specs.append(worker.spec(run.format(core, last, program),
+                                     directory, timeout = self.timeout,
+                                     kind = 'threads', parameter = core))
+        return specs
     def gather(self):
-        """Run program and gather counter statistics."""
+        """Run the sweeps on every worker and merge results per host."""
+
+        import numpy
+
+        if not self.workers:
+            self.tags['hosts'] = 'none'
+            return self
+
+        self.results = worker.Coordinator(self.workers, self.timeout).sweep(self.plan)
+
+        with open(self.log.logdir + '/hosts.csv', 'wb') as data:
+            writer = csv.writer(data)
+            writer.writerow(('worker', 'host', 'kind', 'parameter', 'repetition')
+                            + runner.Record._fields)
+            for name, (description, runs) in sorted(self.results.items()):
+                for result in runs:
+                    writer.writerow((name, result['host'], result['kind'],
+                                     result['parameter'], result['repetition'])
+                                    + tuple([ result[field] for field in runner.Record._fields ]))
+
+        lines = []
+        for name, (description, runs) in sorted(self.results.items()):
+            completed = [ r for r in runs if r['status'] == runner.OK ]
+            lines.append('{0} ({1}, {2} cores)'.format(name, description['host'],
+                                                       description['cores']))
+            workload = [ r['elapsed'] for r in completed if r['kind'] == 'workload' ]
+            if workload:
+                geomean = numpy.exp(numpy.mean(numpy.log(workload)))
+                lines.append('  workload: geomean {0:.5f} over {1} runs'.format(geomean, len(workload)))
+            for kind in [ 'scaling', 'threads' ]:
+                points = [ '{0}={1:.3f}'.format(r['parameter'], r['elapsed'])
+                           for r in completed if r['kind'] == kind ]
+                lines.append('  {0}: {1}'.format(kind, ', '.join(points) or 'none'))
+        self.tags['hosts'] = '\n'.join(lines) or 'unreachable'
+        self.log.debug("Gathered sweeps from {0} workers".format(len(self.results)))
+
         return self
 
+    def export(self):
+        """Return worker runs with their worker, host and sweep."""
+        records = []
+        parameters = []
+        extra = { 'worker': [], 'host': [], 'kind': [], 'repetition': [] }
+        for name, (description, runs) in sorted(self.results.items()):
+            for result in runs:
+                records.append([ result[field] for field in runner.Record._fields ])
+                parameters.append(result['parameter'])
+                extra['worker'].append(name)
+                extra['host'].append(result['host'])
+                extra['kind'].append(result['kind'])
+                extra['repetition'].append(result['repetition'])
+        if not records:
+            return []
+        data = results.columns(records, parameters, runner.Record._fields)
+        data.update(extra)
+        return [ (self.name, data) ]
+
+    def measurements(self):
+        """Return elapsed times per worker, sweep and parameter."""
+        rows = []
+        for name, (description, runs) in sorted(self.results.items()):
+            for result in runs:
+                if result['status'] == runner.OK:
+                    parameter = '{0} {1} {2}'.format(name, result['kind'],
+                                                     result['parameter'])
+                    rows.append(('elapsed', parameter, result['elapsed']))
+        return rows
+
 class ConfigSection(Section):
     """Gather configuration information."""
     def __init__(self):
@@ -495,209 +1763,188 @@ class ConfigSection(Section):
         """Load configuration and update tags."""
         return self
 
-def main():
-    """Gather information into tags, replace on a .tex file and compile."""
+def persist(sections, path=None):
+    """Store measurements and numeric tags, log regressions."""
 
-    Config().load()
+    import history
 
-    cfg = Config()
     log = Log()
     tags = Tags().tags
+    store = history.History(path)
+
+    report = store.record(tags['program'], tags['host'], log.timestamp,
+                          history.fingerprint(), tags.get('compiler'),
+                          tags.get('cflags'))
+    # reused results are already stored with the run that measured them
+    reused = set()
+    for section in sections:
+        if section.reused:
+            reused.update(section.tags.outputs())
+        else:
+            store.add(report, section.name, section.measurements())
+
+    numbers = []
+    for key, value in sorted(tags.iteritems()):
+        if key in reused:
+            continue
+        try:
+            numbers.append((key, None, float(value)))
+        except (TypeError, ValueError):
+            pass
+    store.add(report, 'tags', numbers)
 
-# TODO: check why config file cannot be loaded
-    tags.update(Config().items())
+    for regression in store.regressions(tags['program'], tags['host']):
+        message = 'Regression in {program} {metric}: {value:.5f} vs baseline {baseline:.5f} ({change:+.1%})'
+        log.error(message.format(**regression))
 
-    tags.update(HardwareSection(tags).gather().show().get())
+    store.close()
 
-# TODO: check if baseline results are valid
-# TODO: choose size to fit in 1 minute
-# TODO: cli option to not do any smart thing like choosing problem size
+def export(sections):
+    """Write typed results as JSON metadata and NPZ columns."""
 
-    tags.update(ProgramSection(tags).gather().show().get())
-    tags.update(SoftwareSection(tags).gather().show().get())
+    import history
 
-# TODO: program should be read from a tag
+    log = Log()
+    tags = Tags().tags
+    metrics, text = results.typed(tags)
+    metadata = { 'program': tags.get('program'),
+                 'host': tags.get('host'),
+                 'timestamp': log.timestamp,
+                 'fingerprint': history.fingerprint(),
+                 'metrics': metrics,
+                 'tags': text }
+    tables = []
+    for section in sections:
+        tables += section.export()
+    paths = results.write(log.logdir, metadata, tables)
+    log.debug('Exported results to {0} and {1}'.format(*paths))
+
+def show(program=None):
+    """Print stored geomeans per program and host, flagging regressions."""
+
+    import history
+
+    store = history.History()
+
+    pairs = sorted(set([ (r[1], r[2]) for r in store.reports(program) ]))
+    for name, host in pairs:
+        print '{0} on {1}'.format(name, host)
+        for timestamp, value in store.series(name, 'tags', 'geomean', host):
+            print '  {0} {1:.5f}'.format(timestamp, value)
+
+    for regression in store.regressions(program):
+        message = 'REGRESSION {program} on {host} at {timestamp}: {value:.5f} vs {baseline:.5f} ({change:+.1%})'
+        print message.format(**regression)
+
+    store.close()
 
-    count = CFG.get('count')
-    build = CFG.get('build')
-    run = CFG.get('run')
-    first, last, increment = CFG.get('range', program).split(',')
+def main():
+    """Gather information into tags, replace on a .tex file and compile."""
 
-    tags['range'] = str(range(int(first), int(last), int(increment)))
+    Config().load()
 
-    cores = str(multiprocessing.cpu_count())
+    cfg = Config()
 
-# TODO: get/log human readable output, then process using Python
+    if cfg.args.action == 'history':
+        return show(cfg.args.program)
+    if cfg.args.action == 'worker':
+        return worker.serve(*worker.address(cfg.args.listen))
 
-    pidstat = '& pidstat -s -r -d -u -h -p $! 1 | sed "s| \+|,|g" | grep ^, | cut -b2-'
-    command = run.format(cores, last, program) + pidstat
-    output = subprocess.check_output(command, shell = True)
-
-    with open(self.logger.logdir + '/resources.log', 'w') as log:
-        log.write(output)
-
-    lines = output.splitlines()
-
-# TODO: this should be parsed from output's header, not hardcoded
-
-    header = 'Time,PID,%usr,%system,%guest,%CPU,CPU,minflt/s,majflt/s,VSZ,RSS,%MEM,StkSize,StkRef,kB_rd/s,kB_wr/s,kB_ccwr/s,Command'
-    fields = header.split(',')
-
-    data = {}
-    for i in range(0, len(fields)):
-        field = fields[i]
-        if field in ['%CPU', '%MEM']:
-
-            # TODO: add disk read/writes plots
-
-            data[field] = []
-            for line in lines:
-                data[field].append(line.split(',')[i])
-
-            matplotlib.pyplot.plot(data[field])
-            matplotlib.pyplot.xlabel('{0} usage rate'.format(field))
-            matplotlib.pyplot.grid(True)  
-            matplotlib.pyplot.ylabel('percentage of available resources')
-            matplotlib.pyplot.title('resource usage')
-            name = '{0}.pdf'.format(field, bbox_inches=0).replace('%','')
-            matplotlib.pyplot.savefig(name)
-            matplotlib.pyplot.clf()
-
-    tags['resources'] = output
-    logging.getLogger('bottleneck').debug("Resource usage plotting completed")
-
-    tags.update(BenchmarkSection().gather().show().get())
-    tags.update(WorkloadSection().gather().show.get())
-    tags.update(ScalingSection().gather.show.get())
-
-# TODO: historical comparison
-
-    outputs = []
-    procs = []
-    for core in range(1, int(cores) + 1):
-        start = time.time()
-        output = subprocess.check_output(run.format(core, last, program),
-                                         shell = True)
-        end = time.time()
-        outputs.append(output)
-        elapsed = end - start
-        procs.append(elapsed)
-        log.debug("Threads at {0} took {1:.2f} seconds".format(core, elapsed))
-    array = numpy.array(procs)
-
-    matplotlib.pyplot.plot(procs, label="actual")
-    matplotlib.pyplot.grid(True)  
-
-    ideal = [ procs[0] ]
-    for proc in range(1, len(procs)):
-        ideal.append(procs[proc]/proc+1)
-
-    matplotlib.pyplot.plot(ideal, label="ideal")
-
-    matplotlib.pyplot.xlabel('cores in units')
-    matplotlib.pyplot.xticks(range(0, int(cores)),
-                             range(1, int(cores) + 1))
-    matplotlib.pyplot.ylabel('time in seconds')
-    matplotlib.pyplot.title('thread count scaling')
-    matplotlib.pyplot.savefig('procs.pdf', bbox_inches=0)
-    matplotlib.pyplot.grid(True)  
-    matplotlib.pyplot.clf()
-    log.debug("Plotted thread scaling")
-
-    with open(self.logger.logdir + '/threads.log', 'w') as log:
-        log.write("\n".join(outputs))
-
-    # TODO: procs[1] less than half procs[0] then supralinear then FAIL
-
-    parallel = 2 * (procs[0] - procs[1]) / procs[0]
-    serial = (procs[0] - 2 * (procs[0] - procs[1])) / procs[0]
-    tags['serial'] = "%.5f" % serial
-    tags['parallel'] = "%.5f" % parallel
-
-    tags['amdalah'] = "%.5f" % ( 1 / (serial + (1/1024) * (1 - serial)) )
-    tags['gustafson'] = "%.5f" % ( 1024 - (serial * (1024 - 1)) )
-
-    log.debug("Computed scaling laws")
-
-    outputs = []
-    opts = []
-    for opt in range(0, 4):
-        start = time.time()
-        command = ' && '.join([ build.format('-O{0}'.format(opt)),
-                               run.format(cores, first, program) ])
-        output = subprocess.check_output(command, shell = True)
-        end = time.time()
-        outputs.append(output)
-        elapsed = end - start
-        opts.append(elapsed)
-        optimizations = "Optimizations at {0} took {1:.2f} seconds"
-        log.debug(optimizations.format(opt, elapsed))
-    array = numpy.array(opts)
-
-    matplotlib.pyplot.plot(opts)
-    matplotlib.pyplot.savefig('opts.pdf', bbox_inches=0)
-    matplotlib.pyplot.clf()
-    log.debug("Plotted optimizations")
-
-    with open(self.logger.logdir + '/opts.log', 'w') as log:
-        log.write("\n".join(outputs))
-
-    command = build.format('"-O3 -ftree-vectorizer-verbose=7" 2>&1')
-    output = subprocess.check_output(command, shell = True)
-    tags['vectorizer'] = output
-    log.debug("Vectorization report completed")
-
-    gprofgrep = 'gprof -l -b {0} | grep [a-zA-Z0-9]'
-    command = ' && '.join([ build.format('"-O3 -g -pg"'),
-                            run.format(cores, first, program),
-                            gprofgrep.format(program) ])
-    output = subprocess.check_output(command, shell = True)
-
-    with open(self.logger.logdir + '/vectorization.log', 'w') as log:
-        log.write(output)
-
-    tags['profile'] = output
-    log.debug("Profiling report completed")
-    
-    environment = run.format(cores, first, program).split('./')[0]
-    record = 'perf record ./{0}'.format(program)
-    annotate = 'perf annotate > /tmp/test'
-    command = ' && '.join([ build.format('"-O3 -g"'),
-                           environment + record,
-                           annotate ])
-    output = subprocess.check_output(command, shell = True)
-    cattest = 'cat /tmp/test | grep -v "^\s*:\s*$" | grep -v "0.00"'
-    output = subprocess.check_output(cattest, shell = True)
-
-    with open(self.logger.logdir + '/annotation.log', 'w') as log:
-        log.write(output)
-
-    tags['annotation'] = output
-    log.debug("Source annotation completed")
-
-    counters = 'N={0} perf stat -r 3 ./{1}'.format(last, program)
-    output = subprocess.check_output(command, shell = True)
-    TAG['counters'] = output
-
-    with open(self.logger.logdir + '/counters.log', 'w') as log:
-        log.write(output)
-
-    log.debug("Hardware counters gathering completed")
-
-    template = open('/home/amore/tmp/bottleneck/bt/bt.tex', 'r').read()
-    for key, value in sorted(TAG.iteritems()):
-        log.debug("Replacing macro {0} with {1}".format(key, value))
-        template = template.replace('@@' + key.upper() + '@@',
-                                    value.replace('%', '?'))
-    open(program + '.tex', 'w').write(template)
-
-    latex = 'pdflatex {0}.tex && pdflatex {0}.tex && pdflatex {0}.tex'
-    command = latex.format(program)
-    subprocess.call(command, shell = True)
+    log = Log()
+    tags = Tags().tags
+
+    tags.update(cfg.items())
+    if cfg.args.force:
+        tags['reuse'] = 'no'
+
+    Cache().configure(tags.get('cache-size'), tags.get('cache-age'))
+
+# TODO: check if baseline results are valid
+
+    tags.update(ProgramSection().refresh().show().get())
+
+    program = tags['program']
+    tags['cores'] = str(multiprocessing.cpu_count())
+    tags['dir'] = tags['cwd']
+
+    # checked before anything runs, pinning applies to every later run
+    sections = [ EnvironmentSection().refresh().show() ]
+
+    # without a configured range, sizes are chosen to fit the budget
+    try:
+        sizes = cfg.get('range', program)
+    except (ConfigParser.NoSectionError, ConfigParser.NoOptionError):
+        sizes = 'auto'
+
+    if sizes == 'auto':
+        sections.append(SizingSection())
+        Scheduler().add(sections[-1]).run()
+    else:
+        first, last, increment = sizes.split(',')
+        tags['first'] = first
+        tags['last'] = last
+        tags['increment'] = increment
+
+    tags['range'] = str(range(int(tags['first']),
+                              int(tags['last']) + 1,
+                              int(tags['increment'])))
+
+    # discovery and builds overlap, measurements run alone afterwards
+    scheduler = Scheduler()
+    vectors = VectorizationSection()
+    profile = ProfileSection()
+    measured = [ HardwareSection(),
+                 SoftwareSection(),
+                 SanitySection(),
+                 vectors,
+                 profile,
+                 ResourcesSection(),
+                 BenchmarkSection(),
+                 WorkloadSection(),
+                 ScalingSection(),
+                 ThreadsSection(),
+                 OptimizationSection(),
+                 CountersSection(),
+                 HostsSection() ]
+
+    # every variant is built once, concurrently, before anything is timed
+    variants = []
+    for section in measured:
+        variants += section.variants()
+    if 'build' in tags:
+        log.info('Building {0} program variants'.format(len(set(variants))))
+        with timeline.span('variants', 'build', count = len(set(variants))):
+            Section('builds').builder().prepare(variants)
+
+    for section in measured:
+        scheduler.add(section)
+    scheduler.run()
+    sections += measured
+
+    # both run concurrently, loops are ranked once the profile is known
+    vectors.rank(profile.lines)
+
+    # figures are drawn in parallel once nothing is being measured
+    with timeline.span('render', 'plot'):
+        plots.render('.', tags.get('plot-format', 'pdf'),
+                     int(tags.get('plot-points', 2000)))
+
+    with timeline.span('persist', 'results'):
+        persist(sections)
+        export(sections)
+
+    path = report.locate(report.templates(tags.get('template'), cfg.args.config))
+    log.debug('Rendering template {0}'.format(path))
+    text = report.render(open(path).read(), tags)
+    with open(log.logdir + '/latex.log', 'a') as output:
+        with timeline.span(program, 'latex'):
+            report.typeset(program, text, output)
+
+    Cache().summary()
+
+    timeline.write(log.logdir + '/timeline.json')
+    for line in timeline.summary():
+        log.info(line)
 
 if __name__ == "__main__":
     main()
-
-# _ROOT = os.path.abspath(os.path.dirname(__file__))
-# def get_data(path):
-# return os.path.join(_ROOT, 'data', path)
@@ -0,0 +1,139 @@
+"""
+Bottleneck - Out-of-tree builds of program variants.
+"""
+
+import fnmatch
+import hashlib
+import logging
+import multiprocessing
+import multiprocessing.pool
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+import timeline
+
+# one lock per variant so concurrent requests wait for a single build
+LOCK = threading.Lock()
+LOCKS = {}
+
+# left behind by in-place builds or written by bt into the program
+# directory, neither copied into variant trees nor hashed as inputs
+GENERATED = [ '*.o', '*.cache', '*.tmp', '.git', '.bt', 'bt.cfg', 'bt.out',
+              '*.tex', '*.aux', '*.log', '*.out', '*.toc', '*.lof', '*.lot',
+              '*.pdf', '*.png', '*.svg' ]
+IGNORED = shutil.ignore_patterns(*GENERATED)
+
+def generated(name):
+    """Tell whether a file or directory name is a build or bt output."""
+    return any([ fnmatch.fnmatch(name, pattern) for pattern in GENERATED ])
+
+def inputs(directory):
+    """Return every regular file under directory a build or run may read."""
+    paths = []
+    for root, directories, files in os.walk(directory):
+        directories[:] = sorted([ name for name in directories
+                                  if not generated(name) ])
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if not generated(name) and os.path.isfile(path):
+                paths.append(path)
+    return paths
+
+class Builder:
+    """Build program variants in their own directories, once per flags hash."""
+    def __init__(self, source, root, build, clean=None, jobs=None, digests=()):
+        """Copy source trees under root, hashing (path, digest) of sources."""
+        self.source = source
+        self.root = root
+        self.build = build
+        self.clean = clean
+        self.jobs = jobs or multiprocessing.cpu_count()
+        self.digests = sorted(digests)
+        self.log = logging.getLogger('bottleneck')
+
+    def key(self, flags, compiler=None):
+        """Hash flags, compiler, build commands and sources of a variant."""
+        digest = hashlib.sha1()
+        for value in [ flags, compiler, self.build, self.clean ]:
+            digest.update('{0}\0'.format(value))
+        for name, content in self.digests:
+            digest.update('{0}:{1}\0'.format(name, content))
+        return digest.hexdigest()
+
+    def directory(self, flags, compiler=None):
+        """Return where a variant is built."""
+        return os.path.join(self.root, self.key(flags, compiler), 'tree')
+
+    def output(self, flags, compiler=None):
+        """Open the build output of a variant, building it if needed."""
+        self.make(flags, compiler)
+        return open(os.path.join(self.root, self.key(flags, compiler), 'build.log'))
+
+    def make(self, flags, compiler=None):
+        """Build a variant unless already built, return its directory."""
+        key = self.key(flags, compiler)
+        final = os.path.join(self.root, key)
+        with LOCK:
+            lock = LOCKS.setdefault(key, threading.Lock())
+
+        with lock:
+            if os.path.exists(final):
+                os.utime(final, None)
+                self.log.debug('Reusing {0} build {1} {2}'.format(compiler or 'default', flags, key))
+                return os.path.join(final, 'tree')
+
+            if not os.path.exists(self.root):
+                try:
+                    os.makedirs(self.root)
+                except OSError:
+                    pass
+            temp = tempfile.mkdtemp(prefix = key, suffix = '.tmp', dir = self.root)
+            try:
+                tree = os.path.join(temp, 'tree')
+                shutil.copytree(self.source, tree, symlinks = True, ignore = IGNORED)
+
+                environment = dict(os.environ)
+                environment['MAKEFLAGS'] = '-j{0}'.format(self.jobs)
+                if compiler:
+                    environment['CC'] = compiler
+                cmd = self.build.format(flags)
+                if self.clean:
+                    cmd = '{0}; {1}'.format(self.clean, cmd)
+                with open(os.path.join(temp, 'build.log'), 'w') as log:
+                    with timeline.span('{0} {1}'.format(compiler or 'default', flags),
+                                       'build', key = key):
+                        code = subprocess.call(cmd, shell = True, cwd = tree,
+                                               env = environment, stdout = log,
+                                               stderr = subprocess.STDOUT)
+                if code != 0:
+                    with open(os.path.join(temp, 'build.log')) as log:
+                        raise subprocess.CalledProcessError(code, cmd, log.read())
+
+                # another process may have published the same variant meanwhile
+                try:
+                    os.rename(temp, final)
+                except OSError:
+                    if not os.path.exists(final):
+                        raise
+            finally:
+                if os.path.exists(temp):
+                    shutil.rmtree(temp, ignore_errors = True)
+
+        self.log.debug('Built {0} {1} in {2}'.format(compiler or 'default', flags, final))
+        return os.path.join(final, 'tree')
+
+    def prepare(self, variants, workers=None):
+        """Build (flags, compiler) variants concurrently, return directories."""
+        variants = sorted(set(variants))
+        if not variants:
+            return []
+        size = min(workers or multiprocessing.cpu_count(), len(variants))
+        pool = multiprocessing.pool.ThreadPool(size)
+        try:
+            return pool.map(lambda variant: self.make(*variant), variants)
+        finally:
+            pool.close()
+            pool.join()
@@ -0,0 +1,77 @@
+"""
+Bottleneck - Hardware counters collected with perf stat.
+"""
+
+import pipes
+
+import runner
+
+# events measured together, each group small enough for the general purpose
+# counters so that no group is multiplexed; every group is a separate run
+GROUPS = [ [ 'cycles', 'instructions', 'branches', 'branch-misses' ],
+           [ 'cache-references', 'cache-misses' ],
+           [ 'L1-dcache-loads', 'L1-dcache-load-misses' ],
+           [ 'LLC-loads', 'LLC-load-misses', 'LLC-stores', 'LLC-store-misses' ],
+           [ 'task-clock', 'page-faults', 'context-switches', 'cpu-migrations' ] ]
+
+# bytes moved per last level cache miss
+LINE = 64
+
+# derived metrics with the ratio numerator and denominator events
+RATIOS = [ ('ipc', 'instructions', 'cycles'),
+           ('branch-miss-rate', 'branch-misses', 'branches'),
+           ('cache-miss-rate', 'cache-misses', 'cache-references'),
+           ('l1-miss-rate', 'L1-dcache-load-misses', 'L1-dcache-loads'),
+           ('llc-miss-rate', 'LLC-load-misses', 'LLC-loads') ]
+
+def wrap(command, events, output):
+    """Return a run command measured by perf stat in CSV form into output."""
+    env, argv = runner.parse(command)
+    group = '{' + ','.join(events) + '}'
+    words = [ '{0}={1}'.format(name, pipes.quote(value))
+              for name, value in sorted(env.items()) ]
+    words += [ 'perf', 'stat', '-x,', '-o', output, '-e', group, '--' ]
+    return ' '.join(words + [ pipes.quote(arg) for arg in argv ])
+
+def parse(text):
+    """Return event to (value, percentage of time counted) from perf stat -x, output."""
+    counts = {}
+    for line in text.splitlines():
+        if not line.strip() or line.startswith('#'):
+            continue
+        fields = line.split(',')
+        if len(fields) < 3:
+            continue
+        value, event = fields[0], fields[2]
+
+        # modifiers such as :u are appended to names when not all rings count
+        event = event.split(':')[0]
+        try:
+            value = float(value)
+        except ValueError:
+            value = float('nan')
+        try:
+            running = float(fields[4])
+        except (IndexError, ValueError):
+            running = float('nan')
+        counts[event] = (value, running)
+    return counts
+
+def multiplexed(counts):
+    """Return events counted only part of the time."""
+    return sorted([ event for event, (value, running) in counts.items()
+                    if running < 100 ])
+
+def derive(counts, elapsed):
+    """Return derived metrics from event values and the run elapsed seconds."""
+    values = dict([ (event, value) for event, (value, running) in counts.items() ])
+    nan = float('nan')
+    metrics = {}
+    for name, numerator, denominator in RATIOS:
+        if values.get(denominator):
+            metrics[name] = values.get(numerator, nan) / values[denominator]
+        else:
+            metrics[name] = nan
+    misses = values.get('LLC-load-misses', nan) + values.get('LLC-store-misses', nan)
+    metrics['bandwidth'] = misses * LINE / elapsed / 2 ** 20 if elapsed else nan
+    return metrics
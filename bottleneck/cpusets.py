@@ -0,0 +1,57 @@
+"""
+Bottleneck - Disjoint CPU sets for concurrent runs.
+"""
+
+import glob
+import multiprocessing
+import os
+import re
+
+def expand(cpulist):
+    """Expand a kernel cpulist such as 0-3,8,10-11 into CPU numbers."""
+    cpus = []
+    for chunk in cpulist.strip().split(','):
+        if not chunk:
+            continue
+        if '-' in chunk:
+            first, last = chunk.split('-')
+            cpus.extend(range(int(first), int(last) + 1))
+        else:
+            cpus.append(int(chunk))
+    return cpus
+
+def available():
+    """Return CPUs this process is allowed to run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    try:
+        status = open('/proc/self/status').read()
+        return expand(re.search(r'Cpus_allowed_list:\s*(\S+)', status).group(1))
+    except (IOError, AttributeError):
+        return range(0, multiprocessing.cpu_count())
+
+def nodes():
+    """Return allowed CPUs grouped by NUMA node."""
+    allowed = set(available())
+    groups = []
+    for path in sorted(glob.glob('/sys/devices/system/node/node*/cpulist')):
+        cpus = [ cpu for cpu in expand(open(path).read()) if cpu in allowed ]
+        if cpus:
+            groups.append(cpus)
+    return groups or [ sorted(allowed) ]
+
+def partition(size):
+    """Split allowed CPUs in disjoint sets of size, keeping sets within a node."""
+    size = max(1, int(size))
+    groups = nodes()
+    sets = []
+    for group in groups:
+        for start in range(0, len(group) - size + 1, size):
+            sets.append(group[start:start + size])
+
+    # sets wider than a node span nodes in order
+    if not sets:
+        cpus = [ cpu for group in groups for cpu in group ]
+        for start in range(0, len(cpus) - size + 1, size):
+            sets.append(cpus[start:start + size])
+    return sets
@@ -0,0 +1,97 @@
+"""
+Bottleneck - Measurement environment checks and quiet mode settings.
+"""
+
+import glob
+import os
+import random
+
+import cpusets
+
+SYSFS = '/sys/devices/system/cpu'
+PROCFS = '/proc'
+
+# OpenMP settings keeping each thread on its own core
+PINNING = [ ('OMP_PROC_BIND', 'close'), ('OMP_PLACES', 'cores') ]
+
+# one minute load per core above which other work competes with runs
+LOAD = 0.5
+
+def read(path):
+    """Return the stripped contents of a sysfs or procfs file, None if missing."""
+    try:
+        with open(path) as source:
+            return source.read().strip()
+    except (IOError, OSError):
+        return None
+
+def governors(sysfs=SYSFS):
+    """Return the frequency scaling governors in use."""
+    paths = glob.glob(os.path.join(sysfs, 'cpu[0-9]*', 'cpufreq', 'scaling_governor'))
+    return sorted(set([ value for value in map(read, paths) if value ]))
+
+def turbo(sysfs=SYSFS):
+    """Return whether turbo boost is enabled, None if unknown."""
+    value = read(os.path.join(sysfs, 'intel_pstate', 'no_turbo'))
+    if value is not None:
+        return value == '0'
+    value = read(os.path.join(sysfs, 'cpufreq', 'boost'))
+    if value is not None:
+        return value == '1'
+    return None
+
+def smt(sysfs=SYSFS):
+    """Return whether sibling hardware threads are active, None if unknown."""
+    value = read(os.path.join(sysfs, 'smt', 'active'))
+    if value is not None:
+        return value == '1'
+    paths = glob.glob(os.path.join(sysfs, 'cpu[0-9]*', 'topology', 'thread_siblings_list'))
+    siblings = [ value for value in map(read, paths) if value ]
+    if siblings:
+        return any([ len(cpusets.expand(value)) > 1 for value in siblings ])
+    return None
+
+def load(procfs=PROCFS):
+    """Return the 1, 5 and 15 minutes load averages, None if unknown."""
+    value = read(os.path.join(procfs, 'loadavg'))
+    if value is None:
+        return None
+    return [ float(field) for field in value.split()[:3] ]
+
+def snapshot(sysfs=SYSFS, procfs=PROCFS, environ=None):
+    """Return governors, turbo, SMT, load and OpenMP binding in effect."""
+    environ = os.environ if environ is None else environ
+    return { 'governor': governors(sysfs),
+             'turbo': turbo(sysfs),
+             'smt': smt(sysfs),
+             'load': load(procfs),
+             'pinning': dict([ (name, environ.get(name)) for name, value in PINNING ]) }
+
+def warnings(state, cores):
+    """Return why an environment snapshot may add noise to measurements."""
+    found = []
+    others = [ name for name in state['governor'] if name != 'performance' ]
+    if others:
+        found.append('{0} frequency governor'.format(', '.join(others)))
+    if state['turbo']:
+        found.append('turbo boost enabled')
+    if state['smt']:
+        found.append('SMT enabled')
+    if state['load'] and state['load'][0] > LOAD * cores:
+        found.append('load average {0:.2f} on {1} cores'.format(state['load'][0], cores))
+    return found
+
+def pin(environ):
+    """Bind OpenMP threads to cores unless configured, return what was set."""
+    changed = {}
+    for name, value in PINNING:
+        if name not in environ:
+            environ[name] = value
+            changed[name] = value
+    return changed
+
+def order(points, seed):
+    """Return sweep points shuffled, the same way for the same seed."""
+    points = list(points)
+    random.Random(seed).shuffle(points)
+    return points
@@ -0,0 +1,116 @@
+"""
+Bottleneck - Sampled call stacks folded into flame graphs.
+"""
+
+import collections
+import hashlib
+import pipes
+import re
+
+import plots
+import runner
+
+# frame lines of perf script output: address, symbol and optional offset
+FRAME = re.compile(r'^\s+[0-9a-f]+\s+(.+?)(\+0x[0-9a-f]+)?(\s+\(.*\))?\s*$')
+
+# percentage and key of perf report --stdio lines
+ENTRY = re.compile(r'^\s*([0-9.]+)%\s+(.+?)\s*$')
+
+def record(command, output, mode='fp'):
+    """Return a run command sampled by perf record with call graphs into output."""
+    env, argv = runner.parse(command)
+    words = [ '{0}={1}'.format(name, pipes.quote(value))
+              for name, value in sorted(env.items()) ]
+    words += [ 'perf', 'record', '--call-graph', mode, '-o', output, '--' ]
+    return ' '.join(words + [ pipes.quote(arg) for arg in argv ])
+
+def fold(lines):
+    """Fold perf script samples into root-first stacks and their sample counts."""
+    folded = collections.Counter()
+    comm = None
+    stack = []
+    for line in lines:
+        if not line.strip():
+            if comm is not None:
+                folded[';'.join([ comm ] + stack[::-1])] += 1
+            comm = None
+            stack = []
+        elif not line[0].isspace():
+            comm = line.split()[0]
+        elif comm is not None:
+            match = FRAME.match(line)
+            if match:
+                stack.append(match.group(1))
+    if comm is not None:
+        folded[';'.join([ comm ] + stack[::-1])] += 1
+    return folded
+
+def top(folded, count=10):
+    """Return (function, self share, total share) of the hottest functions."""
+    total = float(sum(folded.values()))
+    own = collections.Counter()
+    inclusive = collections.Counter()
+    for stack, samples in folded.items():
+        names = stack.split(';')[1:] or stack.split(';')
+        own[names[-1]] += samples
+        for frame in set(names):
+            inclusive[frame] += samples
+    return [ (name, samples / total, inclusive[name] / total)
+             for name, samples in own.most_common(count) ]
+
+def report(lines, count=10):
+    """Return (share, key) of the first entries of a perf report listing."""
+    entries = []
+    for line in lines:
+        match = ENTRY.match(line)
+        if match and not line.lstrip().startswith('#'):
+            entries.append((float(match.group(1)) / 100, match.group(2)))
+    return entries[:count]
+
+def color(name):
+    """Return a stable warm color for a function name."""
+    value = int(hashlib.md5(name).hexdigest()[:6], 16)
+    return (0.8 + 0.2 * (value % 256) / 255.0,
+            0.3 + 0.5 * (value / 256 % 256) / 255.0,
+            0.1 * (value / 65536 % 256) / 255.0)
+
+def frames(folded):
+    """Return (depth, start, width, name) rectangles of a flame graph."""
+    total = float(sum(folded.values()))
+    boxes = []
+    pending = []
+    offset = 0.0
+    for names in sorted([ stack.split(';') for stack in folded ]):
+        width = folded[';'.join(names)] / total
+
+        # frames shared with the previous stack keep growing
+        common = 0
+        while (common < len(pending) and common < len(names)
+               and pending[common][0] == names[common]):
+            common += 1
+        for depth in range(common, len(pending)):
+            name, start = pending[depth]
+            boxes.append((depth, start, offset - start, name))
+        pending = pending[:common] + [ (name, offset) for name in names[common:] ]
+        offset += width
+    for depth, (name, start) in enumerate(pending):
+        boxes.append((depth, start, offset - start, name))
+    return boxes
+
+def plot(folded):
+    """Describe folded stacks as a flame graph plot."""
+    boxes = frames(folded)
+    figure = plots.Plot('flamegraph', 'flame graph', 'share of samples',
+                        grid = False)
+    figure.call('barh', [ box[0] for box in boxes ], [ box[2] for box in boxes ],
+                left = [ box[1] for box in boxes ], height = 0.9,
+                color = [ color(box[3]) for box in boxes ], edgecolor = 'white',
+                linewidth = 0.2, align = 'edge')
+    for depth, start, width, name in boxes:
+        if width > 0.05:
+            figure.call('text', start + 0.005, depth + 0.45,
+                        name[:int(width * 80)], fontsize = 5,
+                        verticalalignment = 'center')
+    figure.call('set_xlim', 0, 1)
+    figure.call('set_yticks', [])
+    return figure
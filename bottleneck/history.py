@@ -0,0 +1,134 @@
+"""
+Bottleneck - Historical results database.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import platform
+import socket
+import sqlite3
+
+import numpy
+
+from stats import MAD
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    program TEXT NOT NULL,
+    host TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    fingerprint TEXT,
+    compiler TEXT,
+    cflags TEXT
+);
+CREATE TABLE IF NOT EXISTS measurements (
+    report INTEGER NOT NULL REFERENCES reports(id),
+    section TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    parameter REAL,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS reports_program ON reports(program, host, timestamp);
+CREATE INDEX IF NOT EXISTS reports_host ON reports(host, timestamp);
+CREATE INDEX IF NOT EXISTS reports_timestamp ON reports(timestamp);
+CREATE INDEX IF NOT EXISTS measurements_report ON measurements(report, section, metric);
+"""
+
+def fingerprint():
+    """Hash the host identity: name, platform, processor model and cores."""
+    model = ''
+    try:
+        for line in open('/proc/cpuinfo'):
+            if line.startswith('model name'):
+                model = line.split(':', 1)[1].strip()
+                break
+    except IOError:
+        pass
+    digest = hashlib.sha1()
+    for part in [ socket.getfqdn(), platform.platform(), model,
+                  str(multiprocessing.cpu_count()) ]:
+        digest.update(part)
+    return digest.hexdigest()
+
+class History:
+    """Store of every measurement, indexed by program, host and time."""
+    def __init__(self, path=None):
+        """Open or create the database, ~/.bt/history.db by default."""
+        if path is None:
+            path = '{0}/.bt/history.db'.format(os.path.expanduser("~"))
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def record(self, program, host, timestamp, fingerprint=None,
+               compiler=None, cflags=None):
+        """Create a report entry and return its identifier."""
+        cursor = self.db.execute('INSERT INTO reports (program, host, timestamp, fingerprint, compiler, cflags) VALUES (?, ?, ?, ?, ?, ?)',
+                                 (program, host, timestamp, fingerprint,
+                                  compiler, cflags))
+        self.db.commit()
+        return cursor.lastrowid
+
+    def add(self, report, section, rows):
+        """Store (metric, parameter, value) rows measured by a section."""
+        self.db.executemany('INSERT INTO measurements VALUES (?, ?, ?, ?, ?)',
+                            [ (report, section, metric, parameter, value)
+                              for metric, parameter, value in rows ])
+        self.db.commit()
+        return self
+
+    def reports(self, program=None, host=None, since=None):
+        """Return (id, program, host, timestamp) of matching reports."""
+        query = 'SELECT id, program, host, timestamp FROM reports WHERE 1'
+        args = []
+        for column, value in [ ('program', program), ('host', host) ]:
+            if value is not None:
+                query += ' AND {0} = ?'.format(column)
+                args.append(value)
+        if since is not None:
+            query += ' AND timestamp >= ?'
+            args.append(since)
+        return self.db.execute(query + ' ORDER BY timestamp', args).fetchall()
+
+    def series(self, program, section, metric, host=None, parameter=None):
+        """Return (timestamp, value) of a metric across reports, oldest first."""
+        query = 'SELECT r.timestamp, m.value FROM reports r JOIN measurements m ON m.report = r.id WHERE r.program = ? AND m.section = ? AND m.metric = ?'
+        args = [ program, section, metric ]
+        if host is not None:
+            query += ' AND r.host = ?'
+            args.append(host)
+        if parameter is not None:
+            query += ' AND m.parameter = ?'
+            args.append(parameter)
+        return self.db.execute(query + ' ORDER BY r.timestamp', args).fetchall()
+
+    def regressions(self, program=None, host=None, section='tags',
+                    metric='geomean', window=10, threshold=0.05):
+        """Flag latest values above a rolling median baseline of the previous ones."""
+        found = []
+        pairs = set([ (r[1], r[2]) for r in self.reports(program, host) ])
+        for name, machine in sorted(pairs):
+            values = self.series(name, section, metric, machine)
+            if len(values) < 3:
+                continue
+            timestamp, latest = values[-1]
+            baseline = numpy.array([ v[1] for v in values[-window - 1:-1] ])
+            median = numpy.median(baseline)
+            spread = MAD * numpy.median(numpy.abs(baseline - median))
+            limit = median + max(threshold * median, 3 * spread)
+            if latest > limit:
+                found.append({ 'program': name,
+                               'host': machine,
+                               'timestamp': timestamp,
+                               'metric': metric,
+                               'value': latest,
+                               'baseline': median,
+                               'change': latest / median - 1 })
+        return found
+
+    def close(self):
+        """Close the database."""
+        self.db.close()
+        return self
@@ -0,0 +1,128 @@
+"""
+Bottleneck - Plot rendering.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+
+import timeline
+
+# plots waiting to be rendered once measurements are done
+QUEUE = []
+LOCK = threading.Lock()
+
+class Plot:
+    """Figure described as axes calls, drawn later on its own Figure."""
+    def __init__(self, name, title, xlabel=None, ylabel=None, legend=None,
+                 grid=True):
+        """Create an empty plot saved under name."""
+        self.name = name
+        self.title = title
+        self.xlabel = xlabel
+        self.ylabel = ylabel
+        self.legend = legend
+        self.grid = grid
+        self.calls = []
+
+    def call(self, method, *args, **options):
+        """Record an axes method call."""
+        self.calls.append((method, args, options))
+        return self
+
+    def line(self, x, y, style='-', **options):
+        """Add a line, downsampled when rendered if too long."""
+        return self.call('plot', x, y, style, **options)
+
+    def hist(self, values, **options):
+        """Add a histogram."""
+        return self.call('hist', values, **options)
+
+    def vline(self, x, **options):
+        """Add a vertical line."""
+        return self.call('axvline', x, **options)
+
+    def xticks(self, positions, labels=None):
+        """Set tick positions and labels of the x axis."""
+        self.call('set_xticks', positions)
+        if labels is not None:
+            self.call('set_xticklabels', labels)
+        return self
+
+def add(plot):
+    """Queue a plot for rendering, return it."""
+    with LOCK:
+        QUEUE.append(plot)
+    return plot
+
+def downsample(x, y, points):
+    """Keep minimum and maximum of each bucket so peaks survive decimation."""
+    import numpy
+
+    x = numpy.asarray(x, dtype=float)
+    y = numpy.asarray(y, dtype=float)
+    if points <= 0 or len(y) <= points:
+        return x, y
+    keep = set([ 0, len(y) - 1 ])
+    for bucket in numpy.array_split(numpy.arange(len(y)), points // 2):
+        values = y[bucket]
+        if numpy.isnan(values).all():
+            keep.add(bucket[0])
+            continue
+        keep.add(bucket[numpy.nanargmin(values)])
+        keep.add(bucket[numpy.nanargmax(values)])
+    indexes = sorted(keep)
+    return x[indexes], y[indexes]
+
+def draw(job):
+    """Render one plot to a file without pyplot state.
+
+    Return the path, the worker pid and when drawing started and ended.
+    """
+    plot, path, points = job
+    start = time.time()
+
+    import matplotlib.backends.backend_agg
+    import matplotlib.figure
+
+    figure = matplotlib.figure.Figure()
+    matplotlib.backends.backend_agg.FigureCanvasAgg(figure)
+    axes = figure.add_subplot(111)
+    for method, args, options in plot.calls:
+        if method == 'plot':
+            args = downsample(args[0], args[1], points) + args[2:]
+        getattr(axes, method)(*args, **options)
+    if plot.legend:
+        axes.legend(loc = plot.legend)
+    if plot.xlabel:
+        axes.set_xlabel(plot.xlabel)
+    if plot.ylabel:
+        axes.set_ylabel(plot.ylabel)
+    axes.set_title(plot.title)
+    axes.grid(plot.grid)
+    figure.savefig(path, bbox_inches=0)
+    return path, os.getpid(), start, time.time()
+
+def render(directory='.', extension='pdf', points=2000, workers=None):
+    """Render queued plots in a process pool, return written paths."""
+    with LOCK:
+        jobs = [ (plot, '{0}/{1}.{2}'.format(directory, plot.name, extension), points)
+                 for plot in QUEUE ]
+        del QUEUE[:]
+    if not jobs:
+        return []
+
+    # loaded once here, forked workers share it
+    import matplotlib.figure
+
+    pool = multiprocessing.Pool(min(workers or multiprocessing.cpu_count(), len(jobs)))
+    try:
+        drawn = pool.map(draw, jobs)
+    finally:
+        pool.close()
+        pool.join()
+    for path, pid, start, end in drawn:
+        timeline.add(os.path.basename(path), 'plot', start, end,
+                     process = pid, thread = 'plots')
+    return [ path for path, pid, start, end in drawn ]
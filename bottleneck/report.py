@@ -0,0 +1,102 @@
+"""
+Bottleneck - Report template rendering and LaTeX compilation.
+"""
+
+import bisect
+import hashlib
+import logging
+import os
+import re
+import subprocess
+import sys
+
+import timeline
+
+# template macros such as @@GEOMEAN@@
+MACRO = re.compile(r'@@([A-Z0-9_-]+)@@')
+
+# regions where text is taken literally and must not be escaped
+LITERAL = re.compile(r'\\begin\{verbatim\}.*?\\end\{verbatim\}|\\url\{[^}]*\}',
+                     re.DOTALL)
+
+SPECIAL = re.compile(r'[\\&%$#_{}~^]')
+ESCAPES = { '\\': r'\textbackslash{}',
+            '~': r'\textasciitilde{}',
+            '^': r'\textasciicircum{}' }
+
+# auxiliary files whose changes call for another pdflatex pass
+AUXILIARY = [ '.aux', '.toc', '.out', '.lof', '.lot' ]
+
+def escape(text):
+    """Escape LaTeX special characters."""
+    return SPECIAL.sub(lambda match: ESCAPES.get(match.group(0),
+                                                 '\\' + match.group(0)), text)
+
+def render(template, tags):
+    """Replace every macro in one pass, escaping outside literal regions."""
+    values = dict([ (key.upper(), str(value)) for key, value in tags.items() ])
+    spans = [ match.span() for match in LITERAL.finditer(template) ]
+    starts = [ start for start, end in spans ]
+
+    def replace(match):
+        """Return the escaped or literal value of a known macro."""
+        name = match.group(1)
+        if name not in values:
+            return match.group(0)
+        index = bisect.bisect_right(starts, match.start()) - 1
+        if index >= 0 and match.end() <= spans[index][1]:
+            return values[name].replace('\\end{verbatim}', '\\end {verbatim}')
+        return escape(values[name])
+
+    return MACRO.sub(replace, template)
+
+def locate(candidates):
+    """Return the first existing template path."""
+    for path in candidates:
+        if path and os.path.exists(path):
+            return path
+    raise IOError('Report template not found in {0}'.format(', '.join([ c for c in candidates if c ])))
+
+def templates(configured=None, config=None):
+    """Return template paths to try, most specific first."""
+    package = os.path.dirname(os.path.abspath(__file__))
+    return [ configured,
+             config and os.path.join(os.path.dirname(os.path.abspath(config)), 'bt.tex'),
+             os.path.join(package, '..', 'cfg', 'bt.tex'),
+             os.path.join(sys.prefix, 'config', 'bt.tex') ]
+
+def digest(name):
+    """Hash auxiliary files of a document, absent ones included."""
+    sha = hashlib.sha1()
+    for extension in AUXILIARY:
+        path = name + extension
+        sha.update(extension)
+        if os.path.exists(path):
+            sha.update(open(path, 'rb').read())
+    return sha.hexdigest()
+
+def typeset(name, text, output=None, passes=3):
+    """Write name.tex and run pdflatex until auxiliary files settle.
+
+    Return the number of pdflatex passes.
+    """
+    log = logging.getLogger('bottleneck')
+    path = name + '.tex'
+    with open(path, 'w') as tex:
+        tex.write(text)
+
+    count = 0
+    while count < passes:
+        before = digest(name)
+        try:
+            with timeline.span('pdflatex pass {0}'.format(count + 1), 'latex'):
+                subprocess.call([ 'pdflatex', '-interaction=nonstopmode', path ],
+                                stdout = output, stderr = subprocess.STDOUT)
+        except OSError:
+            log.error('Skipping report compilation, pdflatex not found')
+            break
+        count += 1
+        if digest(name) == before:
+            break
+    log.debug('Compiled {0} in {1} pdflatex passes'.format(path, count))
+    return count
@@ -0,0 +1,90 @@
+"""
+Bottleneck - Machine-readable results next to the report.
+
+Metadata and tags go to results.json, per section columns of runs,
+counters and samples to results.npz under SECTION.COLUMN names.
+"""
+
+import json
+import math
+import os
+
+# bumped whenever names or meaning of exported fields change
+SCHEMA = 1
+
+# run record fields kept as text, the rest are numbers
+TEXT = [ 'command', 'status' ]
+
+def typed(tags):
+    """Split tags into numeric metrics and text values."""
+    metrics = {}
+    text = {}
+    for key, value in tags.items():
+        try:
+            metrics[key] = float(value)
+        except (TypeError, ValueError):
+            text[key] = str(value)
+    return metrics, text
+
+def finite(value):
+    """Replace NaN and infinities, which JSON cannot represent, by None."""
+    if isinstance(value, float):
+        return None if math.isnan(value) or math.isinf(value) else value
+    if isinstance(value, dict):
+        return dict([ (key, finite(item)) for key, item in value.items() ])
+    if isinstance(value, (list, tuple)):
+        return [ finite(item) for item in value ]
+    return value
+
+def columns(records, parameters, fields):
+    """Return run records as field to array columns, parameters as text."""
+    import numpy
+
+    data = { 'parameter': numpy.array([ str(p) for p in parameters ]) }
+    for index, field in enumerate(fields):
+        values = [ record[index] for record in records ]
+        if field in TEXT:
+            data[field] = numpy.array([ str(value) for value in values ])
+        else:
+            data[field] = numpy.array([ numpy.nan if value is None else value
+                                        for value in values ], dtype = float)
+    return data
+
+def write(directory, metadata, sections):
+    """Write metadata and (name, columns) of sections, return both paths."""
+    import numpy
+
+    arrays = {}
+    described = {}
+    for name, data in sections:
+        if not data:
+            continue
+        lengths = [ len(column) for column in data.values() ]
+        described[name] = { 'rows': max(lengths), 'columns': sorted(data) }
+        for column, values in data.items():
+            arrays['{0}.{1}'.format(name, column)] = numpy.asarray(values)
+
+    document = dict(metadata)
+    document['schema'] = SCHEMA
+    document['sections'] = described
+    path = os.path.join(directory, 'results.json')
+    with open(path, 'w') as output:
+        json.dump(finite(document), output, indent = 1, sort_keys = True,
+                  default = str, allow_nan = False)
+
+    binary = os.path.join(directory, 'results.npz')
+    numpy.savez_compressed(binary, **arrays)
+    return path, binary
+
+def read(directory):
+    """Return metadata and section to columns of written results."""
+    import numpy
+
+    with open(os.path.join(directory, 'results.json')) as data:
+        metadata = json.load(data)
+    sections = dict([ (name, {}) for name in metadata['sections'] ])
+    with numpy.load(os.path.join(directory, 'results.npz')) as arrays:
+        for key in arrays.files:
+            name, column = key.split('.', 1)
+            sections[name][column] = arrays[key]
+    return metadata, sections
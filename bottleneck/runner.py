@@ -0,0 +1,128 @@
+"""
+Bottleneck - Program runner.
+"""
+
+import collections
+import os
+import re
+import shlex
+import signal
+import subprocess
+import threading
+import time
+
+# monotonic nanoseconds where available, wall clock on older interpreters
+try:
+    clock = time.perf_counter_ns
+except AttributeError:
+    def clock():
+        """Return wall clock time in nanoseconds."""
+        return int(time.time() * 1e9)
+
+Record = collections.namedtuple('Record', [ 'command', 'returncode',
+                                            'elapsed', 'user', 'system',
+                                            'maxrss', 'minflt', 'majflt',
+                                            'nvcsw', 'nivcsw', 'status' ])
+
+# status of runs that completed, failed, were killed or never started
+OK = 'ok'
+FAILED = 'failed'
+TIMEOUT = 'timeout'
+SKIPPED = 'skipped'
+
+ASSIGNMENT = re.compile(r'^([A-Za-z_][A-Za-z0-9_]*)=(.*)$')
+
+def parse(command):
+    """Split a run command into leading environment assignments and argv."""
+    env = {}
+    argv = shlex.split(command)
+    while argv and ASSIGNMENT.match(argv[0]):
+        name, value = ASSIGNMENT.match(argv.pop(0)).groups()
+        env[name] = value
+    return env, argv
+
+def skip(command):
+    """Return a record for a run that was not attempted."""
+    nan = float('nan')
+    return Record(command, None, nan, nan, nan, nan, nan, nan, nan, nan,
+                  SKIPPED)
+
+def kill(process, expired):
+    """Kill the whole process group of a run that took too long."""
+    expired.set()
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+def prepare(cpus):
+    """Return a child setup leading a process group, pinned to cpus if given."""
+    def setup():
+        """Run in the child between fork and exec."""
+        os.setsid()
+        if cpus:
+            os.sched_setaffinity(0, cpus)
+    return setup
+
+def execute(command, cwd=None, output=None, timeout=None, cpus=None,
+            monitor=None):
+    """Exec a run command without a shell, time it and collect rusage.
+
+    A monitor is called with the child pid and must return an object whose
+    stop method is called once the child is reaped.
+    """
+
+    env, argv = parse(command)
+    environment = dict(os.environ)
+    environment.update(env)
+
+    # interpreters without sched_setaffinity pin through taskset
+    if cpus and not hasattr(os, 'sched_setaffinity'):
+        argv = [ 'taskset', '-c', ','.join([ str(cpu) for cpu in cpus ]) ] + argv
+        cpus = None
+
+    # runs lead their own process group so timeouts reach every child
+    start = clock()
+    process = subprocess.Popen(argv, cwd = cwd, env = environment,
+                               stdout = output, stderr = subprocess.STDOUT,
+                               preexec_fn = prepare(cpus))
+
+    observer = monitor(process.pid) if monitor is not None else None
+
+    expired = threading.Event()
+    timer = None
+    if timeout is not None:
+        timer = threading.Timer(timeout, kill, (process, expired))
+        timer.start()
+
+    pid, status, usage = os.wait4(process.pid, 0)
+    end = clock()
+
+    if timer is not None:
+        timer.cancel()
+    if observer is not None:
+        observer.stop()
+
+    if os.WIFSIGNALED(status):
+        process.returncode = -os.WTERMSIG(status)
+    else:
+        process.returncode = os.WEXITSTATUS(status)
+
+    if expired.is_set():
+        state = TIMEOUT
+    elif process.returncode != 0:
+        state = FAILED
+    else:
+        state = OK
+
+    return Record(command = command,
+                  returncode = process.returncode,
+                  elapsed = (end - start) / 1e9,
+                  user = usage.ru_utime,
+                  system = usage.ru_stime,
+                  maxrss = usage.ru_maxrss,
+                  minflt = usage.ru_minflt,
+                  majflt = usage.ru_majflt,
+                  nvcsw = usage.ru_nvcsw,
+                  nivcsw = usage.ru_nivcsw,
+                  status = state)
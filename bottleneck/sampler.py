@@ -0,0 +1,137 @@
+"""
+Bottleneck - Resource sampler reading /proc while a run executes.
+"""
+
+import os
+import threading
+import time
+
+import numpy
+
+# columns of every sample, cumulative counters are kept as read
+FIELDS = [ 'time', 'cpu', 'rss', 'threads', 'running', 'minflt', 'majflt',
+           'read', 'write', 'nvcsw', 'nivcsw' ]
+
+TICKS = float(os.sysconf('SC_CLK_TCK'))
+PAGE = os.sysconf('SC_PAGESIZE')
+
+def stat(text):
+    """Split a /proc stat line after the command name, which may hold spaces."""
+    return text[text.rindex(')') + 2:].split()
+
+def pairs(text):
+    """Parse 'name: value' lines of /proc status and io files."""
+    values = {}
+    for line in text.splitlines():
+        name, _, value = line.partition(':')
+        values[name] = value.split()[0] if value.split() else ''
+    return values
+
+class Source:
+    """A /proc file kept open and reread from the start on every sample."""
+    def __init__(self, path):
+        """Open path, failing with OSError if the process is gone."""
+        self.fd = os.open(path, os.O_RDONLY)
+    def read(self):
+        """Return the current file contents."""
+        os.lseek(self.fd, 0, os.SEEK_SET)
+        return os.read(self.fd, 4096)
+    def close(self):
+        """Close the file."""
+        os.close(self.fd)
+
+class Sampler:
+    """Sample a process at a fixed rate into a preallocated ring buffer."""
+    def __init__(self, rate=50, capacity=65536):
+        """Prepare sampling rate times per second, keeping the last capacity samples."""
+        self.interval = 1.0 / rate
+        self.buffer = numpy.full((capacity, len(FIELDS)), numpy.nan)
+        self.count = 0
+        self.done = threading.Event()
+        self.sources = {}
+        self.thread = None
+
+    def __call__(self, pid):
+        """Start sampling pid, as a runner monitor."""
+        self.pid = pid
+        for name in [ 'stat', 'status', 'io' ]:
+            try:
+                self.sources[name] = Source('/proc/{0}/{1}'.format(pid, name))
+            except OSError:
+                pass
+        self.start = time.time()
+        self.thread = threading.Thread(target = self.loop)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def sample(self):
+        """Read one row of counters, raising OSError once the process is gone."""
+        row = self.buffer[self.count % len(self.buffer)]
+        row.fill(numpy.nan)
+        row[0] = time.time() - self.start
+
+        fields = stat(self.sources['stat'].read())
+        row[1] = (int(fields[11]) + int(fields[12])) / TICKS
+        row[2] = int(fields[21]) * PAGE / 1024.0
+        row[3] = int(fields[17])
+        row[5] = int(fields[7])
+        row[6] = int(fields[9])
+
+        # per-thread states show how many threads are actually on a CPU
+        running = 0
+        task = '/proc/{0}/task'.format(self.pid)
+        for tid in os.listdir(task):
+            try:
+                with open('{0}/{1}/stat'.format(task, tid)) as thread:
+                    running += stat(thread.read())[0] == 'R'
+            except IOError:
+                pass
+        row[4] = running
+
+        if 'io' in self.sources:
+            io = pairs(self.sources['io'].read())
+            row[7] = float(io.get('read_bytes', 'nan'))
+            row[8] = float(io.get('write_bytes', 'nan'))
+        if 'status' in self.sources:
+            status = pairs(self.sources['status'].read())
+            row[9] = float(status.get('voluntary_ctxt_switches', 'nan'))
+            row[10] = float(status.get('nonvoluntary_ctxt_switches', 'nan'))
+
+        self.count += 1
+
+    def loop(self):
+        """Sample until stopped or until the process is reaped."""
+        if 'stat' not in self.sources:
+            return
+        deadline = time.time()
+        try:
+            while not self.done.is_set():
+                self.sample()
+                deadline += self.interval
+                self.done.wait(max(0, deadline - time.time()))
+        except (OSError, IOError, ValueError, IndexError):
+            pass
+
+    def stop(self):
+        """Stop sampling and release the /proc files."""
+        self.done.set()
+        if self.thread is not None:
+            self.thread.join()
+        for source in self.sources.values():
+            source.close()
+        return self
+
+    def samples(self):
+        """Return samples in time order, the oldest ones lost if the buffer wrapped."""
+        if self.count <= len(self.buffer):
+            return self.buffer[:self.count].copy()
+        split = self.count % len(self.buffer)
+        return numpy.concatenate([ self.buffer[split:], self.buffer[:split] ])
+
+def rates(samples):
+    """Return midpoint times and per-second rates of cumulative columns."""
+    elapsed = numpy.diff(samples[:, 0])
+    elapsed[elapsed <= 0] = numpy.nan
+    deltas = numpy.diff(samples, axis=0) / elapsed[:, None]
+    return (samples[1:, 0] + samples[:-1, 0]) / 2, deltas
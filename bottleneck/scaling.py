@@ -0,0 +1,91 @@
+"""
+Bottleneck - Thread scaling models.
+"""
+
+import numpy
+import scipy.stats
+
+def speedup(threads, times):
+    """Return speedup of every thread count over the single thread time."""
+    threads = numpy.asarray(threads, dtype=float)
+    times = numpy.asarray(times, dtype=float)
+    return times[threads == 1][0] / times
+
+def lstsq(design, values, confidence):
+    """Solve least squares, return estimates, covariance and t quantile."""
+    estimates, residuals, rank, singular = numpy.linalg.lstsq(design, values,
+                                                              rcond=None)
+    freedom = len(values) - design.shape[1]
+    if freedom > 0:
+        variance = numpy.sum((values - design.dot(estimates)) ** 2) / freedom
+        covariance = variance * numpy.linalg.pinv(design.T.dot(design))
+        quantile = scipy.stats.t.ppf((1 + confidence) / 2.0, freedom)
+    else:
+        covariance = numpy.full((design.shape[1], design.shape[1]), numpy.inf)
+        quantile = numpy.inf
+    return estimates, covariance, quantile
+
+def amdahl(threads, times, confidence=0.95):
+    """Fit T(p) = T1 (s + (1 - s) / p), return serial fraction and interval."""
+    threads = numpy.asarray(threads, dtype=float)
+    times = numpy.asarray(times, dtype=float)
+
+    # T(p) = a + b / p with a = T1 s and b = T1 (1 - s)
+    design = numpy.column_stack([ numpy.ones(len(threads)), 1 / threads ])
+    (a, b), covariance, quantile = lstsq(design, times, confidence)
+    serial = a / (a + b)
+
+    # delta method for the ratio
+    gradient = numpy.array([ b, -a ]) / (a + b) ** 2
+    error = numpy.sqrt(gradient.dot(covariance).dot(gradient))
+    return { 'serial': serial,
+             'interval': (serial - quantile * error, serial + quantile * error),
+             'single': a + b }
+
+def gustafson(threads, times, confidence=0.95):
+    """Fit scaled speedup S(p) = p - a (p - 1), return serial fraction a."""
+    threads = numpy.asarray(threads, dtype=float)
+    gains = speedup(threads, times)
+
+    # S(p) - p = -a (p - 1), a line through the origin
+    design = (1 - threads).reshape(-1, 1)
+    (serial,), covariance, quantile = lstsq(design, gains - threads, confidence)
+    error = numpy.sqrt(covariance[0][0])
+    return { 'serial': serial,
+             'interval': (serial - quantile * error, serial + quantile * error) }
+
+def karpflatt(threads, times):
+    """Return the experimentally determined serial fraction per thread count."""
+    threads = numpy.asarray(threads, dtype=float)
+    gains = speedup(threads, times)
+    parallel = threads > 1
+    p = threads[parallel]
+    return p, (1 / gains[parallel] - 1 / p) / (1 - 1 / p)
+
+def usl(threads, times, confidence=0.95):
+    """Fit S(p) = p / (1 + sigma (p - 1) + kappa p (p - 1)) and the best p."""
+    threads = numpy.asarray(threads, dtype=float)
+    gains = speedup(threads, times)
+
+    # p / S(p) - 1 = sigma (p - 1) + kappa p (p - 1), through the origin
+    design = numpy.column_stack([ threads - 1, threads * (threads - 1) ])
+    (sigma, kappa), covariance, quantile = lstsq(design, threads / gains - 1,
+                                                 confidence)
+    errors = numpy.sqrt(numpy.diag(covariance))
+
+    if kappa > 0:
+        optimal = numpy.sqrt((1 - sigma) / kappa)
+    else:
+        optimal = numpy.inf
+    return { 'sigma': sigma,
+             'kappa': kappa,
+             'sigma-interval': (sigma - quantile * errors[0],
+                                sigma + quantile * errors[0]),
+             'kappa-interval': (kappa - quantile * errors[1],
+                                kappa + quantile * errors[1]),
+             'optimal': optimal }
+
+def predict(model, threads):
+    """Return USL speedups predicted at the given thread counts."""
+    p = numpy.asarray(threads, dtype=float)
+    return p / (1 + model['sigma'] * (p - 1) + model['kappa'] * p * (p - 1))
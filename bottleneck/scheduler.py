@@ -0,0 +1,52 @@
+"""
+Bottleneck - Section scheduler.
+"""
+
+import logging
+import multiprocessing
+import multiprocessing.pool
+
+def gather(section):
+    """Populate a section, reusing stored results if fresh, and show its tags."""
+    return section.refresh().show()
+
+class Scheduler:
+    """Run shareable sections concurrently and exclusive sections alone."""
+    def __init__(self, workers=None):
+        """Start with an empty queue, one worker per core by default."""
+        self.workers = workers or multiprocessing.cpu_count()
+        self.sections = []
+        self.log = logging.getLogger('bottleneck')
+
+    def add(self, section):
+        """Queue a section to be gathered on the next run."""
+        self.sections.append(section)
+        return self
+
+    def run(self):
+        """Gather queued sections, exclusive ones once the pool is drained."""
+
+        shareable = [ s for s in self.sections if not s.exclusive ]
+        exclusive = [ s for s in self.sections if s.exclusive ]
+        self.sections = []
+
+        # sections mostly wait on child processes, threads are enough
+        if shareable:
+            size = min(self.workers, len(shareable))
+            self.log.debug('Gathering {0} shareable sections using {1} workers'.format(len(shareable), size))
+            pool = multiprocessing.pool.ThreadPool(size)
+            try:
+                results = [ pool.apply_async(gather, (section,))
+                            for section in shareable ]
+                for result in results:
+                    result.get()
+            finally:
+                pool.close()
+                pool.join()
+
+        # timing-sensitive sections get the machine for themselves
+        for section in exclusive:
+            self.log.debug('Gathering exclusive section named {0}'.format(section.name))
+            gather(section)
+
+        return self
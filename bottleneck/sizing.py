@@ -0,0 +1,26 @@
+"""
+Bottleneck - Problem size models.
+"""
+
+import numpy
+
+def fit(sizes, times):
+    """Fit a power law t = a * N^b by least squares in log-log space."""
+    exponent, intercept = numpy.polyfit(numpy.log(sizes), numpy.log(times), 1)
+    return numpy.exp(intercept), exponent
+
+def predict(model, sizes):
+    """Return predicted runtimes for the given sizes."""
+    factor, exponent = model
+    return factor * numpy.asarray(sizes, dtype=float) ** exponent
+
+def plan(model, budget, points):
+    """Return first, last and increment of an evenly spaced sweep fitting budget."""
+    factor, exponent = model
+    if exponent <= 0:
+        raise ValueError('runtime does not grow with problem size')
+
+    # sizes are k * step for k in 1..points, so the total is closed form
+    weights = numpy.arange(1, points + 1, dtype=float) ** exponent
+    step = max(1, int((budget / (factor * weights.sum())) ** (1.0 / exponent)))
+    return step, step * points, step
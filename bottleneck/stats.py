@@ -0,0 +1,82 @@
+"""
+Bottleneck - Statistics over timing samples.
+"""
+
+import numpy
+import scipy.stats
+
+# scale factor turning a median absolute deviation into a standard deviation
+MAD = 1.4826
+
+# bimodality coefficient of a uniform distribution, higher suggests two modes
+BIMODAL = 5.0 / 9.0
+
+# samples needed before the bimodality coefficient is meaningful
+MODES = 10
+
+def interval(samples, confidence=0.95):
+    """Return mean and half-width of its confidence interval."""
+    array = numpy.asarray(samples, dtype=float)
+    if len(array) < 2:
+        return numpy.mean(array), float('inf')
+    quantile = scipy.stats.t.ppf((1 + confidence) / 2.0, len(array) - 1)
+    return numpy.mean(array), quantile * scipy.stats.sem(array)
+
+def geointerval(samples, confidence=0.95):
+    """Return geometric mean and relative half-width of its interval."""
+    mean, width = interval(numpy.log(samples), confidence)
+    return numpy.exp(mean), numpy.expm1(width)
+
+def robust(samples):
+    """Return median and scaled median absolute deviation."""
+    array = numpy.asarray(samples, dtype=float)
+    median = numpy.median(array)
+    return median, MAD * numpy.median(numpy.abs(array - median))
+
+def fences(samples, factor=1.5):
+    """Return Tukey fences, factor interquartile ranges beyond the quartiles."""
+    lower, upper = numpy.percentile(samples, [ 25, 75 ])
+    spread = upper - lower
+    return lower - factor * spread, upper + factor * spread
+
+def outliers(samples, factor=1.5):
+    """Return a mask of samples outside the Tukey fences."""
+    array = numpy.asarray(samples, dtype=float)
+    if len(array) < 4:
+        return numpy.zeros(len(array), dtype=bool)
+    low, high = fences(array, factor)
+    return (array < low) | (array > high)
+
+def geomean(array, axis=None):
+    """Return geometric mean along an axis."""
+    return numpy.exp(numpy.mean(numpy.log(array), axis=axis))
+
+def bootstrap(samples, statistic=geomean, confidence=0.95, resamples=2000,
+              seed=0):
+    """Return percentile bootstrap interval of a statistic taking an axis."""
+    array = numpy.asarray(samples, dtype=float)
+    generator = numpy.random.RandomState(seed)
+    indexes = generator.randint(0, len(array), (resamples, len(array)))
+    estimates = statistic(array[indexes], axis=1)
+    tail = 100 * (1 - confidence) / 2.0
+    return tuple(numpy.percentile(estimates, [ tail, 100 - tail ]))
+
+def bimodality(samples):
+    """Return the sample bimodality coefficient, nan with too few samples."""
+    array = numpy.asarray(samples, dtype=float)
+    n = len(array)
+    if n < 4 or numpy.ptp(array) == 0:
+        return float('nan')
+    skew = scipy.stats.skew(array, bias=False)
+    kurtosis = scipy.stats.kurtosis(array, bias=False)
+    correction = 3.0 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+    return (skew ** 2 + 1) / (kurtosis + correction)
+
+def noise(samples, threshold=0.05):
+    """Classify samples as stable, noisy or bimodal."""
+    median, deviation = robust(samples)
+    if len(samples) >= MODES and bimodality(samples) > BIMODAL:
+        return 'bimodal'
+    if median and deviation / median > threshold:
+        return 'noisy'
+    return 'stable'
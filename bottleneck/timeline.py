@@ -0,0 +1,105 @@
+"""
+Bottleneck - Timeline of bt's own phases.
+
+Spans are kept in memory and written as a Chrome trace, which loads in
+chrome://tracing or Perfetto. CPU time and peak RSS come from rusage of bt
+and its reaped children, so they cover every thread and command running
+while a span was open.
+"""
+
+import collections
+import contextlib
+import json
+import os
+import resource
+import threading
+import time
+
+Span = collections.namedtuple('Span', [ 'name', 'category', 'start', 'end',
+                                        'cpu', 'rss', 'process', 'thread',
+                                        'args' ])
+
+SPANS = []
+LOCK = threading.Lock()
+
+def usage():
+    """Return CPU seconds and peak RSS in KB of bt and its children."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+    return cpu, max(own.ru_maxrss, children.ru_maxrss)
+
+def add(name, category, start, end, cpu=float('nan'), rss=float('nan'),
+        process=None, thread=None, **args):
+    """Record a finished span, times in seconds since the epoch."""
+    item = Span(name, category, start, end, cpu, rss,
+                process or os.getpid(),
+                thread or threading.current_thread().name, args)
+    with LOCK:
+        SPANS.append(item)
+    return item
+
+@contextlib.contextmanager
+def span(name, category, **args):
+    """Time a block, yielding a dict of arguments it may fill in."""
+    start = time.time()
+    before, peak = usage()
+    try:
+        yield args
+    finally:
+        after, peak = usage()
+        add(name, category, start, time.time(), after - before, peak, **args)
+
+def clear():
+    """Forget recorded spans."""
+    with LOCK:
+        del SPANS[:]
+
+def trace(spans=None):
+    """Return spans as Chrome trace events, threads named by metadata."""
+    with LOCK:
+        spans = list(SPANS if spans is None else spans)
+    threads = {}
+    events = []
+    for item in sorted(spans, key = lambda s: s.start):
+        key = (item.process, item.thread)
+        if key not in threads:
+            threads[key] = len(threads) + 1
+            events.append({ 'name': 'thread_name', 'ph': 'M',
+                            'pid': item.process, 'tid': threads[key],
+                            'args': { 'name': item.thread } })
+        args = dict(item.args)
+        args.update(cpu = item.cpu, rss = item.rss)
+        events.append({ 'name': item.name, 'cat': item.category, 'ph': 'X',
+                        'ts': item.start * 1e6,
+                        'dur': (item.end - item.start) * 1e6,
+                        'pid': item.process, 'tid': threads[key],
+                        'args': args })
+    return { 'traceEvents': events, 'displayTimeUnit': 'ms' }
+
+def write(path):
+    """Write recorded spans as a Chrome trace JSON file."""
+    with open(path, 'w') as output:
+        json.dump(trace(), output, default = str)
+    return path
+
+def summary(count=20):
+    """Return table lines of the longest categories and span names."""
+    with LOCK:
+        spans = list(SPANS)
+    totals = collections.defaultdict(lambda: [ 0, 0.0, 0.0, 0 ])
+    for item in spans:
+        for key in [ (item.category, '*'), (item.category, item.name) ]:
+            total = totals[key]
+            total[0] += 1
+            total[1] += item.end - item.start
+            if item.cpu == item.cpu:
+                total[2] += item.cpu
+            if item.rss == item.rss:
+                total[3] = max(total[3], item.rss)
+
+    lines = [ '{0:<10} {1:>6} {2:>10} {3:>10} {4:>10}  {5}'.format('category', 'count', 'wall', 'cpu', 'rss', 'name') ]
+    ranked = sorted(totals.items(), key = lambda item: -item[1][1])
+    for (category, name), (number, wall, cpu, rss) in ranked[:count]:
+        lines.append('{0:<10} {1:>6} {2:>9.2f}s {3:>9.2f}s {4:>8}KB  {5}'.format(category, number, wall, cpu, rss, name[:60]))
+    return lines
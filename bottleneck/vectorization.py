@@ -0,0 +1,86 @@
+"""
+Bottleneck - Loop vectorization index from compiler remarks.
+"""
+
+import collections
+import os
+import re
+
+# optimization remarks requested from each compiler family
+GCC = '-O3 -g -fopt-info-vec-all'
+CLANG = '-O3 -g -Rpass=loop-vectorize -Rpass-missed=loop-vectorize -Rpass-analysis=loop-vectorize'
+
+# file, line, kind and text of a compiler diagnostic
+REMARK = re.compile(r'^(\S+?):(\d+):(?:\d+:)?\s*(optimized|missed|note|remark|warning):\s*(.*?)\s*(\[-R[^\]]*\])?$')
+
+Loop = collections.namedtuple('Loop', [ 'file', 'line', 'vectorized', 'reasons' ])
+
+def flags(version):
+    """Return remark flags for a compiler given its version banner."""
+    return CLANG if 'clang' in version.lower() else GCC
+
+def reason(text):
+    """Strip the not vectorized prefixes off a missed remark."""
+    for prefix in [ 'loop not vectorized', 'not vectorized' ]:
+        if text.startswith(prefix):
+            text = text[len(prefix):].lstrip(':')
+    return text.strip().rstrip('.')
+
+def parse(lines):
+    """Index vectorization remarks as file:line to Loop.
+
+    GCC reports why a loop was missed in the remarks that follow the loop,
+    often at the line of the offending statement, so reasons go to the
+    loop last reported.
+    """
+    vectorized = {}
+    reasons = collections.defaultdict(list)
+    current = None
+    for line in lines:
+        match = REMARK.match(line.strip())
+        if not match:
+            continue
+        path, number, kind, text = match.groups()[:4]
+        key = '{0}:{1}'.format(os.path.basename(path), number)
+        if 'loop vectorized' in text or text.startswith('vectorized loop'):
+            vectorized[key] = True
+            current = key
+        elif text.startswith("couldn't vectorize loop"):
+            vectorized.setdefault(key, False)
+            current = key
+        elif text.startswith('loop not vectorized'):
+            vectorized.setdefault(key, False)
+            current = key
+            if reason(text) and reason(text) not in reasons[key]:
+                reasons[key].append(reason(text))
+        elif text.startswith('not vectorized') and current is not None:
+            if reason(text) not in reasons[current]:
+                reasons[current].append(reason(text))
+    index = {}
+    for key, done in vectorized.items():
+        name, number = key.rsplit(':', 1)
+        index[key] = Loop(name, int(number), done, reasons[key])
+    return index
+
+def owner(index, key):
+    """Return the loop starting closest at or above a source line, if any."""
+    name, number = key.rsplit(':', 1)
+    name = os.path.basename(name)
+    try:
+        number = int(number)
+    except ValueError:
+        return None
+    candidates = [ loop for loop in index.values()
+                   if loop.file == name and loop.line <= number ]
+    if not candidates:
+        return None
+    return max(candidates, key = lambda loop: loop.line)
+
+def join(index, hot):
+    """Attribute (share, file:line) hot lines to loops, hottest loops first."""
+    shares = collections.Counter()
+    for share, key in hot:
+        loop = owner(index, key)
+        if loop is not None:
+            shares['{0}:{1}'.format(loop.file, loop.line)] += share
+    return [ (share, index[key]) for key, share in shares.most_common() ]
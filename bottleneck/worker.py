@@ -0,0 +1,187 @@
+"""
+Bottleneck - Remote run agent and sweep coordinator.
+
+Workers take newline separated JSON run specs over TCP and answer with one
+JSON line per completed run. They run whatever they are sent, so they must
+only listen on trusted networks.
+"""
+
+import SocketServer
+
+import json
+import logging
+import multiprocessing
+import multiprocessing.pool
+import os
+import pipes
+import socket
+import threading
+
+import runner
+
+PORT = 7070
+
+# seconds to wait for a worker to accept a connection
+CONNECT = 10
+
+# seconds a worker may take to answer on top of the run timeout
+MARGIN = 60
+
+def spec(command, cwd=None, env=None, repetitions=1, timeout=None,
+         kind=None, parameter=None):
+    """Describe runs of a command for a worker."""
+    return { 'command': command, 'cwd': cwd, 'env': env or {},
+             'repetitions': repetitions, 'timeout': timeout,
+             'kind': kind, 'parameter': parameter }
+
+def address(text):
+    """Split host:port, the default port if missing."""
+    host, _, port = text.strip().rpartition(':')
+    if not host:
+        return text.strip(), PORT
+    return host, int(port)
+
+def info():
+    """Describe the worker host."""
+    return { 'host': socket.getfqdn(), 'cores': multiprocessing.cpu_count() }
+
+def execute(request):
+    """Run a spec, yielding one result per repetition."""
+    words = [ '{0}={1}'.format(name, pipes.quote(str(value)))
+              for name, value in sorted(request.get('env', {}).items()) ]
+    command = ' '.join(words + [ request['command'] ])
+    host = socket.getfqdn()
+    with open(os.devnull, 'w') as output:
+        for repetition in range(0, int(request.get('repetitions') or 1)):
+            record = runner.execute(command, request.get('cwd'), output,
+                                    request.get('timeout'))
+            result = record._asdict()
+            result.update(host = host, repetition = repetition,
+                          kind = request.get('kind'),
+                          parameter = request.get('parameter'))
+            yield result
+
+class Handler(SocketServer.StreamRequestHandler):
+    """Answer requests of one coordinator connection."""
+    def handle(self):
+        """Run specs in arrival order, ending each with a done line."""
+        log = logging.getLogger('bottleneck')
+        for line in iter(self.rfile.readline, ''):
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if request.get('info'):
+                    self.send(info())
+                else:
+                    log.debug('Worker running {0}'.format(request['command']))
+                    for result in execute(request):
+                        self.send(result)
+            except (ValueError, KeyError, OSError) as error:
+                self.send({ 'error': str(error) })
+            self.send({ 'done': True })
+
+    def send(self, message):
+        """Write one JSON line and flush it to the coordinator."""
+        self.wfile.write(json.dumps(message) + '\n')
+        self.wfile.flush()
+
+class Server(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    """Worker agent, one thread per coordinator connection."""
+    allow_reuse_address = True
+    daemon_threads = True
+
+def start(host='localhost', port=PORT):
+    """Serve in a background thread, return the server."""
+    server = Server((host, port), Handler)
+    thread = threading.Thread(target = server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+def serve(host='localhost', port=PORT):
+    """Serve until interrupted."""
+    server = Server((host, port), Handler)
+    logging.getLogger('bottleneck').info('Worker listening on {0}:{1}'.format(*server.server_address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+class Connection:
+    """Coordinator side of a worker connection."""
+    def __init__(self, text, timeout=None):
+        """Connect to host:port, waiting for answers up to the run timeout.
+
+        Workers are silent while running, without a run timeout reads wait
+        as long as the run takes.
+        """
+        self.name = text.strip()
+        self.socket = socket.create_connection(address(text), CONNECT)
+        self.socket.settimeout(timeout + MARGIN if timeout else None)
+        self.stream = self.socket.makefile('rb')
+
+    def request(self, message):
+        """Send a request, yield answers until the worker is done."""
+        self.socket.sendall(json.dumps(message) + '\n')
+        for line in iter(self.stream.readline, ''):
+            answer = json.loads(line)
+            if answer.get('done'):
+                return
+            if 'error' in answer:
+                raise RuntimeError('Worker {0} failed: {1}'.format(self.name, answer['error']))
+            yield answer
+        raise IOError('Worker {0} closed the connection'.format(self.name))
+
+    def close(self):
+        """Close the connection."""
+        self.stream.close()
+        self.socket.close()
+
+class Coordinator:
+    """Send sweeps to registered workers and merge their results per worker."""
+    def __init__(self, workers, timeout=None):
+        """Register host:port workers and the timeout of their runs."""
+        self.workers = [ text.strip() for text in workers if text.strip() ]
+        self.timeout = timeout
+        self.log = logging.getLogger('bottleneck')
+
+    def sweep(self, plan):
+        """Run the specs plan(info) returns on every worker at once.
+
+        Runs on one worker are sequential so they do not disturb each
+        other. Return worker to (info, results) of the workers reached.
+        """
+        if not self.workers:
+            return {}
+
+        def run(name):
+            """Run the whole plan on one worker."""
+            try:
+                connection = Connection(name, self.timeout)
+            except (socket.error, IOError) as error:
+                self.log.error('Skipping worker {0}, {1}'.format(name, error))
+                return name, None
+            try:
+                description = list(connection.request({ 'info': True }))[0]
+                results = []
+                for request in plan(description):
+                    results.extend(connection.request(request))
+                self.log.debug('Worker {0} on {1} completed {2} runs'.format(name, description['host'], len(results)))
+                return name, (description, results)
+            except (socket.error, IOError, RuntimeError, ValueError) as error:
+                # one bad host is left out instead of failing the report
+                self.log.error('Skipping worker {0}, {1}'.format(name, error))
+                return name, None
+            finally:
+                connection.close()
+
+        pool = multiprocessing.pool.ThreadPool(len(self.workers))
+        try:
+            merged = pool.map(run, self.workers)
+        finally:
+            pool.close()
+            pool.join()
+        return dict([ (name, value) for name, value in merged if value is not None ])
@@ -0,0 +1,27 @@
+#include <stdlib.h>
+#include <stdio.h>
+
+/* compute bound: balanced iterations working on registers only */
+
+int main()
+{
+  int size = 1024;
+  if (getenv("N"))
+    size = atoi(getenv("N"));
+
+  double sum = 0.0;
+  int i, j;
+
+#pragma omp parallel for private(j) reduction(+:sum)
+  for (i = 0; i < size; ++i) {
+    double x = (double) i / size;
+    for (j = 0; j < size; ++j) {
+      x = x * x * 0.5 + 0.25;
+    }
+    sum += x;
+  }
+
+  printf("%f\n", sum);
+
+  return 0;
+}
@@ -0,0 +1,38 @@
+#include <stdlib.h>
+#include <stdio.h>
+
+/* serial heavy: SERIAL percent of the work runs on one thread */
+
+static double burn(double x, long count)
+{
+  long i;
+  for (i = 0; i < count; ++i) {
+    x = x * x * 0.5 + 0.25;
+  }
+  return x;
+}
+
+int main()
+{
+  int size = 1024;
+  if (getenv("N"))
+    size = atoi(getenv("N"));
+
+  int serial = 25;
+  if (getenv("SERIAL"))
+    serial = atoi(getenv("SERIAL"));
+
+  long total = (long) size * size;
+  long part = total / 100 * serial;
+  double sum = burn(0.5, part);
+  int i;
+
+#pragma omp parallel for reduction(+:sum)
+  for (i = 0; i < size; ++i) {
+    sum += burn((double) i / size, (total - part) / size);
+  }
+
+  printf("%f\n", sum);
+
+  return 0;
+}
@@ -0,0 +1,44 @@
+#include <stdlib.h>
+#include <stdio.h>
+
+/* bandwidth bound: STREAM triad over arrays of N thousand elements */
+
+#define REPEAT 16
+
+int main()
+{
+  long size = 1024;
+  if (getenv("N"))
+    size = atol(getenv("N"));
+  size *= 1000;
+
+  double *a = malloc(sizeof(double) * size);
+  double *b = malloc(sizeof(double) * size);
+  double *c = malloc(sizeof(double) * size);
+
+  long i;
+  int r;
+
+  /* first touch places pages next to the threads using them */
+#pragma omp parallel for
+  for (i = 0; i < size; ++i) {
+    a[i] = 0.0;
+    b[i] = 1.0;
+    c[i] = 2.0;
+  }
+
+  for (r = 0; r < REPEAT; ++r) {
+#pragma omp parallel for
+    for (i = 0; i < size; ++i) {
+      a[i] = b[i] + 3.0 * c[i];
+    }
+  }
+
+  printf("%f\n", a[size / 2]);
+
+  free(a);
+  free(b);
+  free(c);
+
+  return 0;
+}
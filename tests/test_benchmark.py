@@ -0,0 +1,37 @@
+import os
+import tempfile
+import time
+import unittest
+import bottleneck.benchmark as benchmark
+import bottleneck.builds as builds
+import bottleneck.results as results
+import bottleneck.runner as runner
+
+class TestBenchmark(unittest.TestCase):
+    def test_kernels(self):
+        directory = builds.Builder(benchmark.EXAMPLES, tempfile.mkdtemp(),
+                                   'CFLAGS="{0}" make', 'make clean').make('-O2')
+        for name, expected in benchmark.KERNELS:
+            record = runner.execute('OMP_NUM_THREADS=2 N=256 ./{0}'.format(name), directory)
+            assert record.status == runner.OK, 'could not run {0} kernel'.format(name)
+    def test_startup(self):
+        assert benchmark.startup(1) > 0, 'could not time startup'
+    def test_stage(self):
+        directory = benchmark.stage('serial', tempfile.mkdtemp())
+        assert os.path.basename(directory) == 'serial', 'could not name staged kernel'
+        assert os.path.exists(os.path.join(directory, 'bt.cfg')), 'could not stage configuration'
+        assert os.path.exists(os.path.join(directory, 'serial.c')), 'could not stage sources'
+    def test_summarize(self):
+        home = tempfile.mkdtemp()
+        logdir = os.path.join(home, '.bt', 'serial', '20260101-000000')
+        os.makedirs(logdir)
+        runs = { 'elapsed': [ 1.0, 2.0, float('nan') ],
+                 'status': [ runner.OK, runner.OK, runner.SKIPPED ] }
+        remote = { 'elapsed': [ 5.0 ], 'status': [ runner.OK ], 'worker': [ 'node1:7070' ] }
+        results.write(logdir, { 'metrics': { 'serial': 0.3 } },
+                      [ ('workload', runs), ('hosts', remote) ])
+        assert benchmark.latest('serial', time.time() - 60, home) == logdir, 'could not find log directory'
+        summary = benchmark.summarize('serial', 0.25, 0, 7.0, logdir)
+        assert summary['runs'] == 2 and summary['overhead'] == 2.0, 'could not measure overhead'
+        assert abs(summary['serial-error'] - 0.05) < 1e-9, 'could not measure serial fraction error'
+        assert 'off by 0.050' in benchmark.show(summary), 'could not show summary'
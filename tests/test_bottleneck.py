@@ -1,8 +1,12 @@
 import random
 import unittest
 import bottleneck.bottleneck as bt
+import bottleneck.history as history
 import subprocess
 import os
+import sys
+import tempfile
+import time
 
 class TestLogger(unittest.TestCase):
     def test_init(self):
@@ -20,6 +24,35 @@ class TestConfigurationParser(unittest.TestCase):
     def test_get(self):
         pass
 
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = bt.Cache()
+        self.cache.dir = tempfile.mkdtemp()
+    def test_store(self):
+        key = self.cache.key('echo hello')
+        assert self.cache.load(key) is None, 'could not miss empty Cache'
+        self.cache.store(key, 'hello')
+        assert self.cache.load(key) == 'hello', 'could not hit Cache'
+    def test_key(self):
+        path = os.path.join(self.cache.dir, 'source.c')
+        open(path, 'w').write('int main() { return 0; }')
+        before = self.cache.key('make', [ path ])
+        assert before != self.cache.key('make'), 'could not key Cache by inputs'
+        open(path, 'w').write('int main() { return 1; }')
+        assert before != self.cache.key('make', [ path ]), 'could not key Cache by contents'
+    def test_evict(self):
+        self.cache.configure(size=1.0 / 1024, age=7)
+        self.cache.store('old', 'x' * 1024)
+        os.utime(self.cache.path('old'), (time.time() - 60, time.time() - 60))
+        self.cache.store('new', 'x' * 1024)
+        assert self.cache.load('old') is None, 'could not evict oversized Cache'
+        assert self.cache.load('new'), 'could not keep recent Cache'
+        self.cache.configure(size=256, age=0)
+        self.cache.evict()
+        assert self.cache.load('new') is None, 'could not evict expired Cache'
+    def tearDown(self):
+        self.cache.configure(size=256, age=7)
+
 class TestSection(unittest.TestCase):
     def test_init(self):
         """Test how TestSection initialize."""
@@ -40,6 +73,136 @@ class TestSection(unittest.TestCase):
         bt.Tags().tags = { 'key0': 'value0', 'key1': 'value1'}
         assert bt.Section('name').show(), 'could not show Section'
 
+    def test_stream(self):
+        bt.Tags().tags = {}
+        cmd = 'seq 1 100000; echo {0}'.format(random.random())
+        lines = list(bt.Section('name').stream(cmd))
+        assert lines[0:2] == [ '1', '2' ] and len(lines) == 100001, 'could not stream Section'
+        assert list(bt.Section('name').stream(cmd)) == lines, 'could not stream cached Section'
+        partial = bt.Section('name').stream('yes')
+        assert next(partial) == 'y', 'could not stream endless Section'
+        partial.close()
+
+    def test_command(self):
+        bt.Tags().tags = {}
+        assert bt.Section('name').command('echo hello').output == 'hello', 'could not run Section command'
+        self.assertRaises(subprocess.CalledProcessError,
+                          bt.Section('name').command, 'false', False)
+
+    def test_nested(self):
+        directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(directory, 'src'))
+        open(os.path.join(directory, 'src', 'v.c'), 'w').write('old')
+        bt.Tags().tags = { 'dir': directory }
+        cmd = 'cat {0}/src/v.c'.format(directory)
+        assert bt.Section('name').command(cmd).output == 'old', 'could not run Section command'
+        open(os.path.join(directory, 'src', 'v.c'), 'w').write('new')
+        assert bt.Section('name').command(cmd).output == 'new', 'could not rerun on changed nested sources'
+
+    def test_pairs(self):
+        bt.Tags().tags = {}
+        section = bt.Section('name')
+        pool = bt.multiprocessing.pool.ThreadPool(4)
+        try:
+            pool.map(lambda i: section.execute('true {0}'.format(i), parameter = i)
+                     if i % 2 else section.skip('true {0}'.format(i), i), range(0, 32))
+        finally:
+            pool.close()
+            pool.join()
+        pairs = zip(section.parameters, section.records)
+        assert all([ r.command == 'true {0}'.format(p) for p, r in pairs ]), 'could not pair concurrent runs'
+
+class TestVariant(unittest.TestCase):
+    def test_subdirectory(self):
+        directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(directory, 'src'))
+        open(os.path.join(directory, 'Makefile'), 'w').write('k: src/k.c\n\t$(CC) $(CFLAGS) -o k src/k.c\n')
+        open(os.path.join(directory, 'src', 'k.c'), 'w').write('int main() { return 0; }\n')
+        bt.Tags().tags = { 'dir': directory, 'program': 'k',
+                           'build': 'CFLAGS="{0}" make', 'clean': 'rm -f k' }
+        first = bt.Section('variant').variant('-O2')
+        assert subprocess.call('./k', cwd = first) == 0, 'could not build variant'
+        open(os.path.join(directory, 'src', 'k.c'), 'w').write('int main() { return 3; }\n')
+        second = bt.Section('variant').variant('-O2')
+        assert second != first, 'could not key variants by nested sources'
+        assert subprocess.call('./k', cwd = second) == 3, 'could not rebuild nested sources'
+        open(os.path.join(directory, 'k.log'), 'w').write('output')
+        assert bt.Section('variant').variant('-O2') == second, 'could not ignore generated files'
+
+class CountSection(bt.Section):
+    keys = [ 'value' ]
+    kept = [ 'extra' ]
+    def __init__(self):
+        bt.Section.__init__(self, 'count')
+        self.runs = 0
+        self.extra = None
+    def gather(self):
+        self.runs += 1
+        self.tags['doubled'] = str(2 * int(self.tags['value']))
+        self.extra = [ self.runs ]
+        return self
+
+class TestReuse(unittest.TestCase):
+    def setUp(self):
+        self.dir = bt.Cache().dir
+        bt.Cache().dir = tempfile.mkdtemp()
+        bt.Tags().tags = { 'value': '1', 'reuse': 'yes', 'program': 'matrix',
+                           'dir': 'tests/examples' }
+    def test_reuse(self):
+        first = CountSection().refresh()
+        assert first.runs == 1, 'could not gather fresh section'
+        bt.Tags().tags['doubled'] = 'stale'
+        second = CountSection().refresh()
+        assert second.runs == 0, 'could not reuse stored results'
+        assert bt.Tags().tags['doubled'] == '2' and second.extra == [ 1 ], 'could not restore results'
+    def test_stale(self):
+        CountSection().refresh()
+        bt.Tags().tags['value'] = '2'
+        section = CountSection().refresh()
+        assert section.runs == 1 and bt.Tags().tags['doubled'] == '4', 'could not rerun on changed keys'
+    def test_disabled(self):
+        bt.Tags().tags['reuse'] = 'no'
+        CountSection().refresh()
+        assert CountSection().refresh().runs == 1, 'could not disable reuse'
+    def test_nested(self):
+        directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(directory, 'src'))
+        for name in [ 'src/k.c', 'k' ]:
+            open(os.path.join(directory, name), 'w').write('old')
+        bt.Tags().tags.update(dir = directory, program = 'k')
+        CountSection().refresh()
+        open(os.path.join(directory, 'src', 'k.c'), 'w').write('new')
+        assert CountSection().refresh().runs == 1, 'could not rerun on changed nested sources'
+        open(os.path.join(directory, 'k'), 'w').write('new')
+        assert CountSection().refresh().runs == 1, 'could not rerun on changed binary'
+        bt.Tags().tags['build'] = 'make'
+        CountSection().refresh()
+        open(os.path.join(directory, 'k'), 'w').write('rebuilt')
+        assert CountSection().refresh().runs == 0, 'could not ignore rebuilt binary'
+    def test_empty(self):
+        class EmptySection(CountSection):
+            def gather(self):
+                self.runs += 1
+                return self
+        EmptySection().refresh()
+        assert EmptySection().refresh().runs == 1, 'could not skip storing empty results'
+    def test_persist(self):
+        path = os.path.join(tempfile.mkdtemp(), 'history.db')
+        bt.Tags().tags['host'] = 'node1'
+        bt.persist([ CountSection().refresh() ], path)
+        section = CountSection().refresh()
+        assert section.reused, 'could not reuse stored results'
+        bt.persist([ section ], path)
+        store = history.History(path)
+        assert len(store.series('matrix', 'tags', 'doubled', 'node1')) == 1, 'could not skip persisting reused results'
+        store.close()
+    def test_view(self):
+        view = bt.View({ 'a': '1' })
+        view['b'] = '2'
+        assert view.outputs() == { 'b': '2' } and view['a'] == '1', 'could not track written tags'
+    def tearDown(self):
+        bt.Cache().dir = self.dir
+
 class TestHardwareSection(unittest.TestCase):
     def test_init(self):
         assert bt.HardwareSection(), 'could not init HardwareSection'
@@ -56,6 +219,19 @@ class TestProgramSection(unittest.TestCase):
     def test_get(self):
         assert bt.ProgramSection().gather().get()['timestamp'], 'could not get ProgramSection'
 
+class TestEnvironmentSection(unittest.TestCase):
+    def test_quiet(self):
+        bt.Tags().tags = { 'cores': '1', 'quiet': 'yes' }
+        environ = dict(os.environ)
+        try:
+            tags = bt.EnvironmentSection().gather().get()
+            assert os.environ['OMP_PROC_BIND'] and os.environ['OMP_PLACES'], 'could not pin threads'
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+        assert tags['governor'] and tags['turbo'] and tags['smt'], 'could not check environment'
+        assert tags['seed'] and 'OMP_PLACES' in tags['pinning'], 'could not record quiet mode'
+
 class TestSoftwareSection(unittest.TestCase):
     def test_init(self):
         assert bt.SoftwareSection(), 'could not init SoftwareSection'
@@ -85,6 +261,25 @@ class TestSanitySection(unittest.TestCase):
         assert section.gather(), 'could not gather SanitySection'
         assert section.get(), 'could not get SanitySection'
 
+class TestSizingSection(unittest.TestCase):
+    def test_section(self):
+        bt.Tags().tags = {
+            'run': 'OMP_NUM_THREADS={0} N={1} ./{2}',
+            'cores': '2',
+            'program': 'matrix',
+            'dir': 'tests/examples',
+            'clean': 'make clean',
+            'build': 'CFLAGS="{0}" make',
+            'cflags': '-Wall -Wextra -O3',
+            'sweep-budget': '2',
+            'points': '4',
+            'probe': '32',
+            }
+        tags = bt.SizingSection().gather().get()
+        first, last, increment = int(tags['first']), int(tags['last']), int(tags['increment'])
+        assert last == 4 * first and increment == first, 'could not plan SizingSection'
+        assert tags['model'], 'could not model SizingSection'
+
 class TestBenchmarkSection(unittest.TestCase):
     def test_init(self):
         assert bt.BenchmarkSection(), 'could not init BenchmarkSection'
@@ -114,6 +309,23 @@ class TestWorkloadSection(unittest.TestCase):
         assert section.gather(), 'could not init WorkloadSection'
         assert section.get(), 'could not get WorkloadSection'
 
+    def test_adaptive(self):
+        bt.Tags().tags = {
+            'first': '512',
+            'run': 'OMP_NUM_THREADS={0} N={1} {2} 0.05',
+            'cores': '2',
+            'count': 'auto',
+            'min-count': '3',
+            'max-count': '10',
+            'precision': '0.5',
+            'program': 'sleep',
+            'dir': 'tests/examples',
+            }
+        section = bt.WorkloadSection().gather()
+        assert int(section.get()['runs']) == 3, 'could not stop adaptive WorkloadSection'
+        assert float(section.get()['achieved-precision']) <= 0.5, 'could not reach WorkloadSection precision'
+        assert section.get()['precision'] == '0.5', 'could not keep WorkloadSection target precision'
+
 class TestScalingSection(unittest.TestCase):        
     def test_section(self):
         bt.Tags().tags = {
@@ -134,6 +346,69 @@ class TestScalingSection(unittest.TestCase):
         assert section.gather(), 'could not gather ScalingSection'
         assert section.get(), 'could not get ScalingSection'
 
+    def test_budget(self):
+        bt.Tags().tags = {
+            'first': '256',
+            'last': '1024',
+            'increment': '256',
+            'run': 'OMP_NUM_THREADS={0} N={1} ./{2}',
+            'cores': '2',
+            'program': 'matrix',
+            'dir': 'tests/examples',
+            'clean': 'make clean',
+            'build': 'CFLAGS="{0}" make',
+            'cflags': '-Wall -Wextra -O3',
+            'budget': '0.5',
+            }
+        tags = bt.ScalingSection().gather().get()
+        assert '1024' in tags['scaling-skipped'], 'could not skip ScalingSection sizes over budget'
+
+    def test_quiet(self):
+        bt.Tags().tags = {
+            'first': '64',
+            'last': '256',
+            'increment': '64',
+            'run': 'OMP_NUM_THREADS={0} N={1} ./{2}',
+            'cores': '1',
+            'program': 'matrix',
+            'dir': 'tests/examples',
+            'clean': 'make clean',
+            'build': 'CFLAGS="{0}" make',
+            'cflags': '-O2',
+            'quiet': 'yes',
+            'warmup': '2',
+            'seed': '3',
+            }
+        section = bt.ScalingSection()
+        section.isolate = True
+        bt.timeline.clear()
+        section.gather()
+        warmups = [ item for item in bt.timeline.SPANS if item.category == 'warmup' ]
+        assert len(warmups) == 2 and ' N=192 ' in warmups[0].name, 'could not warm up first point'
+        order = [ int(parameter) for parameter in section.parameters ]
+        assert order == bt.environment.order([ 64, 128, 192, 256 ], 3), 'could not shuffle sweep'
+        assert len(section.records) == 4, 'could not leave warm-up runs out'
+
+class TestOptimizationSection(unittest.TestCase):
+    def test_section(self):
+        bt.Tags().tags = {
+            'first': '128',
+            'last': '256',
+            'increment': '128',
+            'run': 'OMP_NUM_THREADS={0} N={1} ./{2}',
+            'cores': '1',
+            'program': 'matrix',
+            'dir': 'tests/examples',
+            'clean': 'make clean',
+            'build': 'CFLAGS="{0}" make',
+            'compilers': 'gcc,missing-cc',
+            }
+        section = bt.OptimizationSection()
+        assert section.compilers == [ 'gcc' ], 'could not drop missing compilers'
+        section.gather()
+        assert [ r.status for r in section.records ] == [ bt.runner.OK ] * 4, 'could not run every optimization level'
+        assert len(set([ r.command for r in section.records ])) == 1, 'could not run prebuilt variants'
+
 class TestProfileSection(unittest.TestCase):
     def test_init(self):
         assert bt.ProfileSection(), 'could not init ProfileSection'
@@ -149,6 +424,24 @@ class TestResourcesSection(unittest.TestCase):
         assert bt.ResourcesSection().gather(), 'could not gather ResourcesSection'
     def test_get(self):
         assert bt.ResourcesSection().gather().get(), 'could not get ResourcesSection'
+    def test_sample(self):
+        bt.Tags().tags = {
+            'last': '512',
+            'run': 'OMP_NUM_THREADS={0} N={1} ./{2}',
+            'cores': '1',
+            'program': 'matrix',
+            'dir': 'tests/examples',
+            'clean': 'make clean',
+            'build': 'CFLAGS="{0}" make',
+            'cflags': '-Wall -Wextra',
+            'sample-rate': '100',
+            }
+        section = bt.ResourcesSection().gather()
+        assert int(section.tags['samples']) > 0, 'could not sample program'
+        assert float(section.tags['rss-peak']) > 0, 'could not sample memory'
+        tables = dict(section.export())
+        assert len(tables['resources']['elapsed']) == 1, 'could not export runs'
+        assert len(tables['resources-samples']['rss']) == int(section.tags['samples']), 'could not export samples'
 
 class TestVectorizationSection(unittest.TestCase):
     def test_init(self):
@@ -166,6 +459,38 @@ class TestCountersSection(unittest.TestCase):
     def test_get(self):
         assert bt.CountersSection().gather().get(), 'could not get CountersSection'
 
+class TestHostsSection(unittest.TestCase):
+    def test_section(self):
+        servers = [ bt.worker.start('localhost', 0) for i in range(0, 2) ]
+        names = [ 'localhost:{0}'.format(s.server_address[1]) for s in servers ]
+        bt.Tags().tags = {
+            'first': '64',
+            'last': '128',
+            'increment': '64',
+            'count': '2',
+            'run': 'OMP_NUM_THREADS={0} N={1} ./{2}',
+            'cores': '1',
+            'program': 'matrix',
+            'dir': 'tests/examples',
+            'clean': 'make clean',
+            'build': 'CFLAGS="{0}" make',
+            'cflags': '-Wall -Wextra',
+            'workers': ','.join(names),
+            }
+        try:
+            section = bt.HostsSection().gather()
+        finally:
+            for server in servers:
+                server.shutdown()
+                server.server_close()
+        assert all([ name in section.tags['hosts'] for name in names ]), 'could not merge hosts'
+        assert len(section.measurements()) >= 2 * 4, 'could not measure on workers'
+
+class TestStartup(unittest.TestCase):
+    def test_lazy(self):
+        cmd = [ sys.executable, '-c', 'import sys, bottleneck.bottleneck; print [ m for m in sys.modules if m.split(".")[0] in ("numpy", "scipy", "matplotlib") ]' ]
+        assert subprocess.check_output(cmd).strip() == '[]', 'could not defer heavy imports'
+
 class TestScript(unittest.TestCase):
     def test_install(self):
         assert subprocess.check_output('sudo python setup.py install', shell=True)
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import tempfile
+import unittest
+import bottleneck.builds as builds
+
+MAKEFILE = 'all:\n\techo "$(CC) $(CFLAGS)" > flags\n\techo built >> count\n'
+
+class TestBuilder(unittest.TestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        open(os.path.join(self.source, 'Makefile'), 'w').write(MAKEFILE)
+        self.builder = builds.Builder(self.source, self.root, 'CFLAGS="{0}" make',
+                                      'rm -f count', 2, [ ('Makefile', 'a') ])
+    def test_make(self):
+        directory = self.builder.make('-O2', 'gcc')
+        assert directory.startswith(self.root), 'could not build out of tree'
+        assert open(os.path.join(directory, 'flags')).read().strip() == 'gcc -O2', 'could not pass flags and compiler'
+        assert not os.path.exists(os.path.join(self.source, 'flags')), 'could not leave source tree alone'
+        assert self.builder.make('-O2', 'gcc') == directory, 'could not reuse variant'
+        assert open(os.path.join(directory, 'count')).read().count('built') == 1, 'could not skip rebuild'
+    def test_key(self):
+        assert self.builder.key('-O2') != self.builder.key('-O3'), 'could not key variants by flags'
+        assert self.builder.key('-O2') != self.builder.key('-O2', 'clang'), 'could not key variants by compiler'
+        changed = builds.Builder(self.source, self.root, 'CFLAGS="{0}" make',
+                                 'rm -f count', 2, [ ('Makefile', 'b') ])
+        assert changed.key('-O2') != self.builder.key('-O2'), 'could not key variants by sources'
+    def test_inputs(self):
+        for name in [ 'src/k.c', 'src/k.inc', 'rules.mk', 'k.o', 'report.pdf', '.bt/x', '.git/HEAD' ]:
+            path = os.path.join(self.source, name)
+            if not os.path.exists(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            open(path, 'w').write(name)
+        paths = [ os.path.relpath(path, self.source) for path in builds.inputs(self.source) ]
+        assert paths == [ 'Makefile', 'rules.mk', 'src/k.c', 'src/k.inc' ], 'could not list nested inputs'
+    def test_prepare(self):
+        directories = self.builder.prepare([ ('-O{0}'.format(opt), None) for opt in range(0, 4) ] * 2)
+        assert len(set(directories)) == 4, 'could not build each variant once'
+        assert 'MAKEFLAGS' not in os.environ, 'could not keep make flags to builds'
+    def test_output(self):
+        with self.builder.output('-O1') as output:
+            assert 'echo built' in output.read(), 'could not keep build output'
+    def test_failure(self):
+        broken = builds.Builder(self.source, self.root, 'false {0}')
+        self.assertRaises(subprocess.CalledProcessError, broken.make, '-O2')
+        assert os.listdir(self.root) == [], 'could not discard failed build'
@@ -0,0 +1,36 @@
+import unittest
+import numpy
+import bottleneck.counters as counters
+import bottleneck.runner as runner
+
+OUTPUT = """# started on Mon Jan  1 00:00:00 2024
+
+2000,,cycles,1000000,100.00,,
+3000,,instructions,1000000,100.00,1.50,insn per cycle
+100,,branches,1000000,100.00,,
+5,,branch-misses,1000000,100.00,5.00,of all branches
+<not supported>,,LLC-loads,0,100.00,,
+1024,,LLC-load-misses:u,500000,50.00,,
+"""
+
+class TestCounters(unittest.TestCase):
+    def test_wrap(self):
+        cmd = counters.wrap('OMP_NUM_THREADS=2 N=512 ./matrix', [ 'cycles', 'instructions' ], '/tmp/out')
+        env, argv = runner.parse(cmd)
+        assert env == { 'OMP_NUM_THREADS': '2', 'N': '512' }, 'could not keep environment'
+        assert argv == [ 'perf', 'stat', '-x,', '-o', '/tmp/out', '-e', '{cycles,instructions}', '--', './matrix' ], 'could not wrap command'
+    def test_parse(self):
+        counts = counters.parse(OUTPUT)
+        assert counts['instructions'] == (3000, 100), 'could not parse event'
+        assert numpy.isnan(counts['LLC-loads'][0]), 'could not parse unsupported event'
+        assert counts['LLC-load-misses'] == (1024, 50), 'could not strip modifiers'
+        assert counters.multiplexed(counts) == [ 'LLC-load-misses' ], 'could not find multiplexed events'
+    def test_derive(self):
+        metrics = counters.derive(counters.parse(OUTPUT), 1.0)
+        assert metrics['ipc'] == 1.5, 'could not derive ipc'
+        assert metrics['branch-miss-rate'] == 0.05, 'could not derive branch miss rate'
+        assert numpy.isnan(metrics['llc-miss-rate']), 'could not skip unsupported events'
+        assert numpy.isnan(metrics['cache-miss-rate']), 'could not skip missing events'
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,19 @@
+import unittest
+import bottleneck.cpusets as cpusets
+
+class TestCpusets(unittest.TestCase):
+    def test_expand(self):
+        assert cpusets.expand('0-3,8,10-11\n') == [ 0, 1, 2, 3, 8, 10, 11 ], 'could not expand cpulist'
+    def test_available(self):
+        assert cpusets.available(), 'could not get available CPUs'
+    def test_partition(self):
+        sets = cpusets.partition(1)
+        assert len(sets) == len(cpusets.available()), 'could not partition single CPUs'
+        cpus = [ cpu for cpuset in cpusets.partition(2) for cpu in cpuset ]
+        assert len(cpus) == len(set(cpus)), 'could not partition disjoint sets'
+        assert all([ len(cpuset) == 2 for cpuset in cpusets.partition(2) ]), 'could not partition sized sets'
+    def test_oversized(self):
+        assert cpusets.partition(100000) == [], 'could not reject oversized sets'
+
+if __name__ == '__main__':
+    unittest.main()
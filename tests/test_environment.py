@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+import bottleneck.environment as environment
+
+def write(root, path, content):
+    path = os.path.join(root, path)
+    if not os.path.exists(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as output:
+        output.write(content + '\n')
+
+class TestEnvironment(unittest.TestCase):
+    def setUp(self):
+        self.sysfs = tempfile.mkdtemp()
+        self.procfs = tempfile.mkdtemp()
+    def test_snapshot(self):
+        for cpu, governor in enumerate([ 'powersave', 'performance' ]):
+            write(self.sysfs, 'cpu{0}/cpufreq/scaling_governor'.format(cpu), governor)
+            write(self.sysfs, 'cpu{0}/topology/thread_siblings_list'.format(cpu), '0-1')
+        write(self.sysfs, 'intel_pstate/no_turbo', '0')
+        write(self.procfs, 'loadavg', '3.50 1.00 0.50 2/300 1234')
+        state = environment.snapshot(self.sysfs, self.procfs, {})
+        assert state['governor'] == [ 'performance', 'powersave' ], 'could not read governors'
+        assert state['turbo'] and state['smt'], 'could not read turbo and SMT'
+        assert state['load'] == [ 3.5, 1.0, 0.5 ], 'could not read load average'
+        assert len(environment.warnings(state, 2)) == 4, 'could not warn about noise'
+    def test_unknown(self):
+        state = environment.snapshot(self.sysfs, self.procfs, {})
+        assert state['turbo'] is None and state['smt'] is None and state['load'] is None, 'could not tell unknown'
+        assert environment.warnings(state, 1) == [], 'could not skip unknown checks'
+    def test_quiet(self):
+        write(self.sysfs, 'cpu0/cpufreq/scaling_governor', 'performance')
+        write(self.sysfs, 'cpufreq/boost', '0')
+        write(self.sysfs, 'smt/active', '0')
+        write(self.procfs, 'loadavg', '0.10 0.10 0.10 1/100 1')
+        state = environment.snapshot(self.sysfs, self.procfs, {})
+        assert environment.warnings(state, 1) == [], 'could not accept quiet environment'
+    def test_pin(self):
+        environ = { 'OMP_PLACES': 'threads' }
+        assert environment.pin(environ) == { 'OMP_PROC_BIND': 'close' }, 'could not keep configured binding'
+        assert environ['OMP_PLACES'] == 'threads', 'could not keep configured places'
+    def test_order(self):
+        points = range(0, 20)
+        shuffled = environment.order(points, 7)
+        assert sorted(shuffled) == points and shuffled != points, 'could not shuffle points'
+        assert environment.order(points, 7) == shuffled, 'could not repeat order'
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+import bottleneck.flamegraph as flamegraph
+import bottleneck.plots as plots
+import bottleneck.runner as runner
+
+SCRIPT = """matrix
+\t          4005d6 multiply+0x26
+\t          400812 main+0x42
+\t    7f0a1b2c3d4e __libc_start_main+0xf0
+
+matrix
+\t          4005d6 multiply+0x31
+\t          400812 main+0x42
+\t    7f0a1b2c3d4e __libc_start_main+0xf0
+
+matrix
+\t          400700 init+0x10
+\t          400812 main+0x42
+\t    7f0a1b2c3d4e __libc_start_main+0xf0
+"""
+
+REPORT = """# Overhead  Source:Line
+# ........  ...........
+#
+    66.67%  matrix.c:25
+    33.33%  matrix.c:12
+"""
+
+class TestFlamegraph(unittest.TestCase):
+    def test_record(self):
+        env, argv = runner.parse(flamegraph.record('N=512 ./matrix', '/tmp/perf.data'))
+        assert env == { 'N': '512' }, 'could not keep environment'
+        assert argv[:2] == [ 'perf', 'record' ] and argv[-1] == './matrix', 'could not wrap command'
+    def test_fold(self):
+        folded = flamegraph.fold(SCRIPT.splitlines())
+        assert folded == { 'matrix;__libc_start_main;main;multiply': 2,
+                           'matrix;__libc_start_main;main;init': 1 }, 'could not fold stacks'
+    def test_top(self):
+        hottest = flamegraph.top(flamegraph.fold(SCRIPT.splitlines()), 1)
+        assert hottest[0][0] == 'multiply', 'could not find hottest function'
+        assert abs(hottest[0][1] - 2 / 3.0) < 1e-9 and abs(hottest[0][2] - 2 / 3.0) < 1e-9, 'could not compute shares'
+    def test_frames(self):
+        boxes = flamegraph.frames(flamegraph.fold(SCRIPT.splitlines()))
+        roots = [ box for box in boxes if box[0] == 0 ]
+        assert len(roots) == 1 and abs(roots[0][2] - 1) < 1e-9, 'could not merge shared frames'
+        assert len(boxes) == 5, 'could not lay out frames'
+    def test_plot(self):
+        path = tempfile.mktemp(suffix = '.pdf')
+        plots.draw((flamegraph.plot(flamegraph.fold(SCRIPT.splitlines())), path, 0))
+        assert os.path.exists(path), 'could not render flame graph'
+        os.remove(path)
+    def test_report(self):
+        lines = flamegraph.report(REPORT.splitlines())
+        assert abs(lines[0][0] - 0.6667) < 1e-9 and lines[0][1] == 'matrix.c:25', 'could not parse hot lines'
+        assert len(lines) == 2, 'could not skip comments'
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import os
+import tempfile
+import unittest
+import bottleneck.history as history
+
+class TestHistory(unittest.TestCase):
+    def setUp(self):
+        self.store = history.History(os.path.join(tempfile.mkdtemp(), 'history.db'))
+    def record(self, timestamp, geomean):
+        report = self.store.record('matrix', 'node', timestamp, history.fingerprint(), 'gcc', '-O3')
+        self.store.add(report, 'tags', [ ('geomean', None, geomean) ])
+        self.store.add(report, 'scaling', [ ('elapsed', 512, geomean * 2) ])
+        return report
+    def test_series(self):
+        self.record('20140101-000000', 1.0)
+        self.record('20140102-000000', 1.1)
+        assert [ v for t, v in self.store.series('matrix', 'tags', 'geomean') ] == [ 1.0, 1.1 ], 'could not query series'
+        assert self.store.series('matrix', 'scaling', 'elapsed', 'node', 512)[-1][1] == 2.2, 'could not query parameter'
+        assert len(self.store.reports('matrix', since='20140102')) == 1, 'could not query reports by time'
+    def test_regressions(self):
+        for day, value in enumerate([ 1.0, 1.01, 0.99, 1.0, 1.02 ]):
+            self.record('201401{0:02d}-000000'.format(day + 1), value)
+        assert self.store.regressions() == [], 'could not accept stable results'
+        self.record('20140110-000000', 1.5)
+        found = self.store.regressions('matrix')
+        assert len(found) == 1 and found[0]['value'] == 1.5, 'could not detect regression'
+    def test_fingerprint(self):
+        assert history.fingerprint() == history.fingerprint(), 'could not fingerprint host'
+    def tearDown(self):
+        self.store.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+import bottleneck.plots as plots
+
+class TestPlots(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        del plots.QUEUE[:]
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    def test_plot(self):
+        plot = plots.Plot('line', 'title', 'x', 'y', 'upper right')
+        plot.line([ 1, 2, 3 ], [ 3, 2, 1 ], 'b-o', label = 'line').vline(2).xticks([ 1, 2, 3 ], [ 'a', 'b', 'c' ])
+        assert [ call[0] for call in plot.calls ] == [ 'plot', 'axvline', 'set_xticks', 'set_xticklabels' ], 'could not record calls'
+    def test_draw(self):
+        plot = plots.Plot('hist', 'histogram').hist([ 1, 2, 2, 3 ], bins = 3)
+        for extension in [ 'pdf', 'png' ]:
+            path = '{0}/hist.{1}'.format(self.directory, extension)
+            plots.draw((plot, path, 0))
+            assert os.path.getsize(path) > 0, 'could not draw ' + extension
+    def test_downsample(self):
+        y = numpy.sin(numpy.arange(100000) / 100.0)
+        y[12345] = 10
+        x, y = plots.downsample(numpy.arange(len(y)), y, 1000)
+        assert len(y) <= 1002, 'could not downsample'
+        assert y.max() == 10 and 12345 in x, 'could not keep peaks'
+        assert list(x) == sorted(x), 'could not keep order'
+    def test_render(self):
+        for name in [ 'first', 'second', 'third' ]:
+            plots.add(plots.Plot(name, name).line(range(0, 10), range(0, 10)))
+        paths = plots.render(self.directory, 'png', workers = 2)
+        assert len(paths) == 3 and all([ os.path.exists(path) for path in paths ]), 'could not render queue'
+        assert plots.render(self.directory) == [], 'could not empty queue'
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+import unittest
+import bottleneck.report as report
+
+TEMPLATE = r"""\title{@@PROGRAM@@ Report}
+Overhead: {\tt @@OVERHEAD@@\%} @@MISSING@@
+\begin{verbatim}
+@@PROFILE@@
+\end{verbatim}
+More: \url{@@CWD@@/bt.log}
+"""
+
+class TestReport(unittest.TestCase):
+    def test_escape(self):
+        assert report.escape('50% of a_b & $x {y} #1') == r'50\% of a\_b \& \$x \{y\} \#1', 'could not escape specials'
+        assert report.escape('a\\b~c^d') == r'a\textbackslash{}b\textasciitilde{}c\textasciicircum{}d', 'could not escape symbols'
+    def test_render(self):
+        tags = { 'program': 'my_prog', 'overhead': '5', 'profile': '50% main_loop', 'cwd': '/home/a_b' }
+        text = report.render(TEMPLATE, tags)
+        assert r'\title{my\_prog Report}' in text, 'could not escape text macro'
+        assert '\n50% main_loop\n' in text, 'could not keep verbatim literal'
+        assert r'\url{/home/a_b/bt.log}' in text, 'could not keep url literal'
+        assert '@@MISSING@@' in text, 'could not leave unknown macros'
+    def test_single(self):
+        text = report.render('@@A@@ @@B@@', { 'a': '@@B@@', 'b': 'b' })
+        assert text == '@@B@@ b', 'could not replace in a single pass'
+    def test_locate(self):
+        path = tempfile.mktemp()
+        self.assertRaises(IOError, report.locate, [ None, path ])
+        assert os.path.exists(report.locate(report.templates())), 'could not find packaged template'
+    def test_typeset(self):
+        directory = tempfile.mkdtemp()
+        name = directory + '/report'
+        report.typeset(name, 'text')
+        assert open(name + '.tex').read() == 'text', 'could not write report'
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import tempfile
+import unittest
+import numpy
+import bottleneck.results as results
+import bottleneck.runner as runner
+
+class TestResults(unittest.TestCase):
+    def test_typed(self):
+        metrics, text = results.typed({ 'geomean': '0.5', 'program': 'matrix' })
+        assert metrics == { 'geomean': 0.5 } and text == { 'program': 'matrix' }, 'could not type tags'
+    def test_columns(self):
+        records = [ runner.Record('./a', 0, 1.5, 1.0, 0.1, 100, 1, 0, 2, 3, runner.OK),
+                    runner.skip('./a') ]
+        data = results.columns(records, [ 64, None ], runner.Record._fields)
+        assert list(data['parameter']) == [ '64', 'None' ], 'could not keep parameters'
+        assert data['elapsed'][0] == 1.5 and numpy.isnan(data['returncode'][1]), 'could not type numbers'
+        assert list(data['status']) == [ runner.OK, runner.SKIPPED ], 'could not keep status'
+    def test_write(self):
+        directory = tempfile.mkdtemp()
+        samples = { 'time': numpy.arange(1000) / 50.0, 'rss': numpy.ones(1000) }
+        results.write(directory, { 'program': 'matrix',
+                                   'metrics': { 'geomean': 0.5, 'precision': float('inf'),
+                                                'serial': [ float('nan') ] } },
+                      [ ('resources-samples', samples), ('empty', {}) ])
+        metadata, sections = results.read(directory)
+        assert metadata['schema'] == results.SCHEMA, 'could not version results'
+        assert metadata['metrics']['geomean'] == 0.5, 'could not keep metadata'
+        assert metadata['metrics']['precision'] is None, 'could not write infinities as null'
+        assert metadata['metrics']['serial'] == [ None ], 'could not write NaN as null'
+        assert 'NaN' not in open(directory + '/results.json').read(), 'could not write strict JSON'
+        assert metadata['sections']['resources-samples']['rows'] == 1000, 'could not describe sections'
+        assert 'empty' not in sections, 'could not skip empty sections'
+        assert numpy.array_equal(sections['resources-samples']['time'], samples['time']), 'could not keep columns'
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import time
+import unittest
+import bottleneck.runner as runner
+
+class TestParse(unittest.TestCase):
+    def test_parse(self):
+        env, argv = runner.parse('OMP_NUM_THREADS=2 N=512 ./matrix -v')
+        assert env == { 'OMP_NUM_THREADS': '2', 'N': '512' }, 'could not parse environment'
+        assert argv == [ './matrix', '-v' ], 'could not parse arguments'
+    def test_quotes(self):
+        env, argv = runner.parse('FLAGS="-a -b" prog "x y"')
+        assert env == { 'FLAGS': '-a -b' }, 'could not parse quoted environment'
+        assert argv == [ 'prog', 'x y' ], 'could not parse quoted arguments'
+
+class TestExecute(unittest.TestCase):
+    def test_elapsed(self):
+        record = runner.execute('sleep 0.2')
+        assert record.returncode == 0, 'could not execute'
+        assert 0.2 <= record.elapsed < 1, 'could not time execution'
+        assert record.maxrss > 0, 'could not collect rusage'
+    def test_environment(self):
+        cmd = 'VALUE=expected sh -c \'test "$VALUE" = expected\''
+        assert runner.execute(cmd).returncode == 0, 'could not pass environment'
+    def test_cwd(self):
+        directory = tempfile.mkdtemp()
+        with tempfile.TemporaryFile() as output:
+            runner.execute('pwd', directory, output)
+            output.seek(0)
+            assert os.path.realpath(output.read().strip()) == os.path.realpath(directory), 'could not pass cwd'
+    def test_failure(self):
+        record = runner.execute('false')
+        assert record.returncode == 1 and record.status == runner.FAILED, 'could not report failure'
+    def test_timeout(self):
+        record = runner.execute('sleep 5', timeout=0.2)
+        assert record.status == runner.TIMEOUT, 'could not report timeout'
+        assert record.elapsed < 1, 'could not kill on timeout'
+    def test_group(self):
+        path = tempfile.mktemp()
+        cmd = 'sh -c \'sleep 30 & echo $! > {0}; wait\''.format(path)
+        runner.execute(cmd, timeout=0.2)
+        child = int(open(path).read())
+        time.sleep(0.1)
+        status = '/proc/{0}/status'.format(child)
+        assert not os.path.exists(status) or 'zombie' in open(status).read(), 'could not kill process group'
+    def test_cpus(self):
+        with tempfile.TemporaryFile() as output:
+            runner.execute('grep Cpus_allowed_list /proc/self/status', output=output, cpus=[ 0 ])
+            output.seek(0)
+            assert output.read().split()[-1] == '0', 'could not pin to CPUs'
+    def test_skip(self):
+        record = runner.skip('./program')
+        assert record.status == runner.SKIPPED, 'could not skip'
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+import numpy
+import bottleneck.runner as runner
+import bottleneck.sampler as sampler
+
+BUSY = 'python -c "import time\nend = time.time() + 0.3\nwhile time.time() < end: pass"'
+
+class TestSampler(unittest.TestCase):
+    def test_sample(self):
+        probe = sampler.Sampler(100)
+        record = runner.execute(BUSY, monitor = probe)
+        assert record.status == runner.OK, 'could not run sampled program'
+        data = probe.samples()
+        assert len(data) >= 10, 'could not sample short run'
+        cpu = data[:, sampler.FIELDS.index('cpu')]
+        assert cpu[-1] > cpu[0], 'could not sample cpu time'
+        assert numpy.nanmax(data[:, sampler.FIELDS.index('rss')]) > 0, 'could not sample rss'
+    def test_ring(self):
+        instance = sampler.Sampler(capacity = 4)
+        instance.buffer[:, 0] = [ 4, 5, 2, 3 ]
+        instance.count = 6
+        assert list(instance.samples()[:, 0]) == [ 2, 3, 4, 5 ], 'could not order wrapped samples'
+    def test_rates(self):
+        data = numpy.array([ [ 0.0, 0.0 ], [ 0.5, 1.0 ], [ 1.0, 3.0 ] ])
+        times, deltas = sampler.rates(data)
+        assert list(times) == [ 0.25, 0.75 ], 'could not compute midpoints'
+        assert list(deltas[:, 1]) == [ 2.0, 4.0 ], 'could not compute rates'
+    def test_stat(self):
+        fields = sampler.stat('42 (a b) R 1 2 3')
+        assert fields[:2] == [ 'R', '1' ], 'could not split stat line'
+
+if __name__ == '__main__':
+    unittest.main()
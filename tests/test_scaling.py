@@ -0,0 +1,36 @@
+import unittest
+import numpy
+import bottleneck.scaling as scaling
+
+THREADS = numpy.arange(1, 9)
+
+class TestLaws(unittest.TestCase):
+    def test_amdahl(self):
+        times = 10.0 * (0.1 + 0.9 / THREADS)
+        model = scaling.amdahl(THREADS, times)
+        assert abs(model['serial'] - 0.1) < 1e-9, 'could not fit serial fraction'
+        assert abs(model['single'] - 10.0) < 1e-9, 'could not fit single time'
+    def test_interval(self):
+        generator = numpy.random.RandomState(0)
+        times = 10.0 * (0.1 + 0.9 / THREADS) * (1 + generator.normal(0, 0.01, len(THREADS)))
+        low, high = scaling.amdahl(THREADS, times)['interval']
+        assert low < 0.1 < high, 'could not bound serial fraction'
+    def test_gustafson(self):
+        times = numpy.ones(len(THREADS))
+        model = scaling.gustafson(THREADS, times)
+        assert abs(model['serial'] - 1.0) < 1e-9, 'could not fit scaled serial fraction'
+    def test_karpflatt(self):
+        times = 10.0 * (0.2 + 0.8 / THREADS)
+        p, fractions = scaling.karpflatt(THREADS, times)
+        assert list(p) == range(2, 9), 'could not skip single thread'
+        assert numpy.allclose(fractions, 0.2), 'could not compute serial fraction'
+    def test_usl(self):
+        model = { 'sigma': 0.05, 'kappa': 0.01 }
+        times = 10.0 / scaling.predict(model, THREADS)
+        fitted = scaling.usl(THREADS, times)
+        assert abs(fitted['sigma'] - 0.05) < 1e-9, 'could not fit contention'
+        assert abs(fitted['kappa'] - 0.01) < 1e-9, 'could not fit coherency'
+        assert abs(fitted['optimal'] - numpy.sqrt(0.95 / 0.01)) < 1e-6, 'could not find optimal threads'
+
+if __name__ == '__main__':
+    unittest.main()
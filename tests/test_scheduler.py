@@ -0,0 +1,41 @@
+import time
+import unittest
+import bottleneck.bottleneck as bt
+import bottleneck.scheduler as scheduler
+
+class SleepSection(bt.Section):
+    def __init__(self, name, events, exclusive=False):
+        bt.Section.__init__(self, name)
+        self.events = events
+        self.exclusive = exclusive
+    def gather(self):
+        self.events.append(('start', self.name))
+        time.sleep(0.2)
+        self.events.append(('end', self.name))
+        return self
+
+class TestScheduler(unittest.TestCase):
+    def test_shareable(self):
+        events = []
+        sched = scheduler.Scheduler(workers=4)
+        for i in range(0, 4):
+            sched.add(SleepSection('shareable{0}'.format(i), events))
+        start = time.time()
+        sched.run()
+        assert time.time() - start < 0.6, 'shareable sections did not overlap'
+        assert len(events) == 8, 'could not gather all sections'
+    def test_exclusive(self):
+        events = []
+        sched = scheduler.Scheduler(workers=4)
+        sched.add(SleepSection('exclusive0', events, exclusive=True))
+        sched.add(SleepSection('shareable', events))
+        sched.add(SleepSection('exclusive1', events, exclusive=True))
+        sched.run()
+        assert events[0:2] == [('start', 'shareable'), ('end', 'shareable')], 'exclusive section overlapped'
+        assert events[2:] == [('start', 'exclusive0'), ('end', 'exclusive0'),
+                              ('start', 'exclusive1'), ('end', 'exclusive1')], 'exclusive sections overlapped'
+    def test_empty(self):
+        assert scheduler.Scheduler().run(), 'could not run empty scheduler'
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+import numpy
+import bottleneck.sizing as sizing
+
+class TestModel(unittest.TestCase):
+    def test_fit(self):
+        sizes = [ 64, 128, 256, 512 ]
+        times = sizing.predict((1e-6, 2.0), sizes)
+        factor, exponent = sizing.fit(sizes, times)
+        assert abs(factor - 1e-6) < 1e-9, 'could not fit factor'
+        assert abs(exponent - 2.0) < 1e-6, 'could not fit exponent'
+    def test_plan(self):
+        model = (1e-6, 2.0)
+        first, last, increment = sizing.plan(model, 60, 8)
+        assert last == first * 8 and increment == first, 'could not plan sweep'
+        total = numpy.sum(sizing.predict(model, range(first, last + 1, increment)))
+        assert 55 < total <= 60, 'could not fit sweep in budget'
+    def test_flat(self):
+        self.assertRaises(ValueError, sizing.plan, (1.0, 0.0), 60, 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import math
+import random
+import unittest
+import bottleneck.stats as stats
+
+class TestInterval(unittest.TestCase):
+    def test_interval(self):
+        mean, width = stats.interval([ 1.0, 2.0, 3.0 ])
+        assert mean == 2.0, 'could not compute mean'
+        assert abs(width - 2.4841) < 1e-3, 'could not compute interval'
+    def test_single(self):
+        mean, width = stats.interval([ 1.0 ])
+        assert math.isinf(width), 'could not reject single sample'
+    def test_geointerval(self):
+        samples = [ random.gauss(1.0, 0.01) for i in range(0, 100) ]
+        geomean, width = stats.geointerval(samples)
+        assert abs(geomean - 1.0) < 0.01, 'could not compute geomean'
+        assert 0 < width < 0.01, 'could not compute relative interval'
+
+class TestRobust(unittest.TestCase):
+    def test_robust(self):
+        median, mad = stats.robust([ 1.0, 1.0, 2.0, 3.0, 100.0 ])
+        assert median == 2.0 and abs(mad - 1.4826) < 1e-9, 'could not compute median and MAD'
+    def test_outliers(self):
+        samples = [ 1.0, 1.01, 0.99, 1.02, 0.98, 1.0, 3.0 ]
+        assert list(stats.outliers(samples)) == [ False ] * 6 + [ True ], 'could not flag outliers'
+        assert not stats.outliers([ 1.0, 3.0 ]).any(), 'could not skip small samples'
+    def test_bootstrap(self):
+        samples = [ random.gauss(1.0, 0.01) for i in range(0, 50) ]
+        low, high = stats.bootstrap(samples)
+        assert low < stats.geomean(samples) < high, 'could not bootstrap interval'
+    def test_noise(self):
+        stable = [ random.gauss(1.0, 0.001) for i in range(0, 50) ]
+        bimodal = [ 1.0 ] * 25 + [ 2.0 ] * 25
+        noisy = [ random.uniform(0.5, 1.5) for i in range(0, 3) ] + [ 0.5, 1.5 ]
+        assert stats.noise(stable) == 'stable', 'could not classify stable samples'
+        assert stats.noise(bimodal) == 'bimodal', 'could not classify bimodal samples'
+        assert stats.noise(noisy) == 'noisy', 'could not classify noisy samples'
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+import bottleneck.timeline as timeline
+
+class TestTimeline(unittest.TestCase):
+    def setUp(self):
+        timeline.clear()
+    def tearDown(self):
+        timeline.clear()
+    def test_span(self):
+        with timeline.span('sleep', 'command', section = 'test') as args:
+            time.sleep(0.01)
+            args['cached'] = False
+        item = timeline.SPANS[-1]
+        assert item.name == 'sleep' and item.category == 'command', 'could not record span'
+        assert item.end - item.start >= 0.01, 'could not time span'
+        assert item.cpu >= 0 and item.rss > 0, 'could not measure usage'
+        assert item.args == { 'section': 'test', 'cached': False }, 'could not keep arguments'
+    def test_trace(self):
+        timeline.add('first', 'section', 1.0, 2.0, 0.5, 100)
+        timeline.add('second', 'plot', 1.5, 1.75, process = 42, thread = 'plots')
+        path = timeline.write(os.path.join(tempfile.mkdtemp(), 'timeline.json'))
+        events = json.load(open(path))['traceEvents']
+        spans = [ event for event in events if event['ph'] == 'X' ]
+        names = [ event for event in events if event['ph'] == 'M' ]
+        assert [ event['name'] for event in spans ] == [ 'first', 'second' ], 'could not order events'
+        assert spans[0]['ts'] == 1e6 and spans[0]['dur'] == 1e6, 'could not convert to microseconds'
+        assert spans[1]['pid'] == 42, 'could not keep process'
+        assert len(names) == 2 and names[1]['args']['name'] == 'plots', 'could not name threads'
+    def test_summary(self):
+        for name in [ 'a', 'a', 'b' ]:
+            timeline.add(name, 'command', 0.0, 1.0, 1.0, 10)
+        timeline.add('slow', 'latex', 0.0, 10.0)
+        lines = timeline.summary()
+        assert lines[1].split()[0] == 'latex', 'could not rank by wall time'
+        assert any([ line.split()[:2] == [ 'command', '3' ] for line in lines ]), 'could not count category'
+        assert len(timeline.summary(2)) == 3, 'could not limit lines'
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import bottleneck.vectorization as vectorization
+
+GCC = """cc -O3 -g -fopt-info-vec-all matrix.c -o matrix
+matrix.c:26:5: missed: couldn't vectorize loop
+matrix.c:26:5: missed: not vectorized: multiple nested loops.
+matrix.c:27:21: missed: couldn't vectorize loop
+matrix.c:28:14: missed: not vectorized: complicated access pattern.
+matrix.c:10:14: missed: statement clobbers memory: a_30 = malloc (_6);
+matrix.c:17:19: optimized: loop vectorized using 16 byte vectors
+"""
+
+CLANG = """matrix.c:27:21: remark: loop not vectorized: cannot identify array bounds [-Rpass-analysis=loop-vectorize]
+matrix.c:17:19: remark: vectorized loop (vectorization width: 4, interleaved count: 2) [-Rpass=loop-vectorize]
+"""
+
+class TestVectorization(unittest.TestCase):
+    def test_flags(self):
+        assert vectorization.flags('clang version 15.0.7') == vectorization.CLANG, 'could not detect clang'
+        assert vectorization.flags('cc (GCC) 12.2.0') == vectorization.GCC, 'could not detect gcc'
+    def test_gcc(self):
+        index = vectorization.parse(GCC.splitlines())
+        assert sorted(index) == [ 'matrix.c:17', 'matrix.c:26', 'matrix.c:27' ], 'could not index loops'
+        assert index['matrix.c:17'].vectorized, 'could not find vectorized loop'
+        assert index['matrix.c:27'].reasons == [ 'complicated access pattern' ], 'could not attach reason'
+        assert index['matrix.c:26'].reasons == [ 'multiple nested loops' ], 'could not strip reason'
+    def test_clang(self):
+        index = vectorization.parse(CLANG.splitlines())
+        assert index['matrix.c:17'].vectorized, 'could not find vectorized loop'
+        assert index['matrix.c:27'].reasons == [ 'cannot identify array bounds' ], 'could not parse remark'
+    def test_join(self):
+        index = vectorization.parse(GCC.splitlines())
+        hot = [ (0.6, 'matrix.c:28'), (0.2, 'matrix.c:27'), (0.1, 'matrix.c:18'), (0.1, '??:0') ]
+        loops = vectorization.join(index, hot)
+        assert abs(loops[0][0] - 0.8) < 1e-9 and loops[0][1].line == 27, 'could not attribute lines to loops'
+        assert loops[1][1].line == 17, 'could not rank loops'
+        assert len(loops) == 2, 'could not skip unknown lines'
+
+if __name__ == '__main__':
+    unittest.main()
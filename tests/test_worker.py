@@ -0,0 +1,50 @@
+import unittest
+import bottleneck.runner as runner
+import bottleneck.worker as worker
+
+class TestWorker(unittest.TestCase):
+    def setUp(self):
+        self.servers = [ worker.start('localhost', 0) for i in range(0, 2) ]
+        self.names = [ 'localhost:{0}'.format(server.server_address[1])
+                       for server in self.servers ]
+    def test_sweep(self):
+        def plan(info):
+            assert info['cores'] >= 1, 'could not describe worker'
+            return [ worker.spec('echo $SIZE', env = { 'SIZE': size },
+                                 repetitions = 2, kind = 'scaling',
+                                 parameter = size) for size in [ 1, 2 ] ]
+        results = worker.Coordinator(self.names).sweep(plan)
+        assert sorted(results) == sorted(self.names), 'could not merge results per worker'
+        for info, runs in results.values():
+            assert len(runs) == 4, 'could not repeat runs'
+            assert [ r['parameter'] for r in runs ] == [ 1, 1, 2, 2 ], 'could not keep run order'
+            assert all([ r['status'] == runner.OK for r in runs ]), 'could not run specs'
+    def test_failure(self):
+        results = worker.Coordinator(self.names[:1]).sweep(lambda info: [ worker.spec('false') ])
+        assert results[self.names[0]][1][0]['status'] == runner.FAILED, 'could not report failed runs'
+    def test_unreachable(self):
+        self.servers[1].shutdown()
+        self.servers[1].server_close()
+        results = worker.Coordinator(self.names).sweep(lambda info: [])
+        assert sorted(results) == self.names[:1], 'could not skip unreachable workers'
+    def test_broken(self):
+        def plan(info):
+            return [ worker.spec('true'), { 'cwd': None } ]
+        results = worker.Coordinator(self.names).sweep(plan)
+        assert results == {}, 'could not skip failing workers'
+        def slow(info):
+            return [ worker.spec('sleep 1') ]
+        margin = worker.MARGIN
+        worker.MARGIN = 0
+        try:
+            results = worker.Coordinator(self.names[:1], 0.2).sweep(slow)
+        finally:
+            worker.MARGIN = margin
+        assert results == {}, 'could not skip workers timing out'
+    def test_address(self):
+        assert worker.address('node1:7000') == ('node1', 7000), 'could not parse address'
+        assert worker.address('node1') == ('node1', worker.PORT), 'could not default port'
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()